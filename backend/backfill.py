@@ -1,7 +1,14 @@
+import sys
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
 import boto3
+from boto3.dynamodb.conditions import Attr
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table("piazza-chunks")
+posts_table = dynamodb.Table("piazza-posts")
+diffs_table = dynamodb.Table("piazza-post-diffs")
 
 
 def backfill_titles():
@@ -43,5 +50,155 @@ def backfill_titles():
     print(f"Backfill complete. Updated {updated_count} items.")
 
 
+def backfill_needs_summary():
+    # Flag every post that is still waiting on a summary so it shows up in the
+    # summarizer's sparse SummaryPendingIndex (the scraper sets this going forward)
+    scan_filter = (
+        Attr("last_major_update").gt(Attr("summary_last_updated"))
+        & Attr("needs_summary").not_exists()
+    )
+
+    response = posts_table.scan(FilterExpression=scan_filter)
+    items = response.get("Items", [])
+
+    while "LastEvaluatedKey" in response:
+        response = posts_table.scan(
+            FilterExpression=scan_filter, ExclusiveStartKey=response["LastEvaluatedKey"]
+        )
+        items.extend(response.get("Items", []))
+
+    print(f"Found {len(items)} posts pending summarization")
+
+    for item in items:
+        posts_table.update_item(
+            Key={"course_id": item["course_id"], "post_id": item["post_id"]},
+            UpdateExpression="SET needs_summary = :ns",
+            ExpressionAttributeValues={":ns": 1},
+        )
+
+    print(f"Backfill complete. Flagged {len(items)} posts.")
+
+
+def backfill_utc_timestamps():
+    # Older posts stored last_major_update/last_updated with an LA offset; rewrite them in UTC
+    # once so the summarizer never has to normalize them on write
+    utc = ZoneInfo("UTC")
+    timestamp_attrs = ("last_major_update", "last_updated")
+    projection = "course_id, post_id, " + ", ".join(timestamp_attrs)
+
+    response = posts_table.scan(ProjectionExpression=projection)
+    items = response.get("Items", [])
+
+    while "LastEvaluatedKey" in response:
+        response = posts_table.scan(
+            ProjectionExpression=projection, ExclusiveStartKey=response["LastEvaluatedKey"]
+        )
+        items.extend(response.get("Items", []))
+
+    print(f"Found {len(items)} posts to check")
+
+    updated_count = 0
+    for item in items:
+        updates = {}
+        for attr in timestamp_attrs:
+            value = item.get(attr)
+            if not value or value.endswith(("+00:00", "Z")):
+                continue
+            try:
+                dt = datetime.fromisoformat(value)
+            except ValueError:
+                continue
+            if dt.tzinfo and dt.utcoffset().total_seconds() != 0:
+                updates[attr] = dt.astimezone(utc).isoformat()
+
+        if updates:
+            posts_table.update_item(
+                Key={"course_id": item["course_id"], "post_id": item["post_id"]},
+                UpdateExpression="SET " + ", ".join(f"{attr} = :{attr}" for attr in updates),
+                ExpressionAttributeValues={f":{attr}": value for attr, value in updates.items()},
+            )
+            updated_count += 1
+
+    print(f"Backfill complete. Normalized {updated_count} posts.")
+
+
+def backfill_summary_sentinel():
+    # Posts written before the scraper stored a sentinel have no summary_last_updated at all;
+    # give them the same never-summarized value so every row compares as a string
+    scan_filter = Attr("summary_last_updated").not_exists()
+
+    response = posts_table.scan(
+        FilterExpression=scan_filter, ProjectionExpression="course_id, post_id"
+    )
+    items = response.get("Items", [])
+
+    while "LastEvaluatedKey" in response:
+        response = posts_table.scan(
+            FilterExpression=scan_filter,
+            ProjectionExpression="course_id, post_id",
+            ExclusiveStartKey=response["LastEvaluatedKey"],
+        )
+        items.extend(response.get("Items", []))
+
+    print(f"Found {len(items)} posts without summary_last_updated")
+
+    conditional_check_failed = posts_table.meta.client.exceptions.ConditionalCheckFailedException
+    updated_count = 0
+    for item in items:
+        # don't clobber a timestamp the summarizer wrote since the scan
+        try:
+            posts_table.update_item(
+                Key={"course_id": item["course_id"], "post_id": item["post_id"]},
+                UpdateExpression="SET summary_last_updated = :never",
+                ConditionExpression="attribute_not_exists(summary_last_updated)",
+                ExpressionAttributeValues={":never": "1970-01-01T00:00:00Z"},
+            )
+        except conditional_check_failed:
+            print(f"Skipped post {item['post_id']}: summarized since the scan")
+            continue
+        updated_count += 1
+
+    print(f"Backfill complete. Set the sentinel on {updated_count} posts.")
+
+
+def backfill_content_preview():
+    # The summarizer only reads content_preview, which the scraper started storing on new diffs;
+    # give older diffs one too so pending posts aren't summarized without their content
+    scan_kwargs = {
+        "FilterExpression": Attr("content_preview").not_exists(),
+        "ProjectionExpression": "#pk, #ts, content",
+        "ExpressionAttributeNames": {"#pk": "course_id#post_id", "#ts": "timestamp"},
+    }
+
+    response = diffs_table.scan(**scan_kwargs)
+    items = response.get("Items", [])
+
+    while "LastEvaluatedKey" in response:
+        response = diffs_table.scan(**scan_kwargs, ExclusiveStartKey=response["LastEvaluatedKey"])
+        items.extend(response.get("Items", []))
+
+    print(f"Found {len(items)} diffs without content_preview")
+
+    for item in items:
+        content = item.get("content")
+        # same 500 chars the scraper stores (DIFF_PREVIEW_LENGTH)
+        diffs_table.update_item(
+            Key={"course_id#post_id": item["course_id#post_id"], "timestamp": item["timestamp"]},
+            UpdateExpression="SET content_preview = :p",
+            ExpressionAttributeValues={":p": content[:500] if content else ""},
+        )
+
+    print(f"Backfill complete. Set content_preview on {len(items)} diffs.")
+
+
+BACKFILLS = {
+    "titles": backfill_titles,
+    "needs_summary": backfill_needs_summary,
+    "utc_timestamps": backfill_utc_timestamps,
+    "summary_sentinel": backfill_summary_sentinel,
+    "content_preview": backfill_content_preview,
+}
+
+
 if __name__ == "__main__":
-    backfill_titles()
+    BACKFILLS[sys.argv[1] if len(sys.argv) > 1 else "titles"]()
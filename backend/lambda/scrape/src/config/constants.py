@@ -11,6 +11,22 @@ PINECONE_NAMESPACE = "piazza"
 DYNAMO_BATCH_GET_SIZE = 100
 PINECONE_BATCH_SIZE = 25
 CHUNK_SIZE_WORDS = 100
+# how much of each diff's content the summarizer reads
+DIFF_PREVIEW_LENGTH = 500
+# how many posts PostManager processes at the same time
+MAX_WORKERS = 10
+# how many courses IncrementalScraper scrapes at the same time; kept low because they all
+# share one Piazza login
+MAX_COURSE_WORKERS = 4
+# FullScraper waits at least this long between Piazza post fetches, and retries a refused
+# fetch up to PIAZZA_MAX_ATTEMPTS times, doubling the wait from PIAZZA_BACKOFF_SECONDS
+PIAZZA_MIN_REQUEST_INTERVAL = 0.2
+PIAZZA_MAX_ATTEMPTS = 4
+PIAZZA_BACKOFF_SECONDS = 2
+
+# how long a warm container reuses Parameter Store values before re-reading them,
+# so a rotated Piazza password is picked up without a redeploy
+PARAMETER_CACHE_TTL_SECONDS = 15 * 60
 
 SECRETS = {
     "PIAZZA_USER": "piazza_username",
@@ -47,4 +63,6 @@ S_ANSWER_UPDATE_TYPES = [UpdateType.STUDENT_ANSWER.value, UpdateType.STUDENT_ANS
 DISCUSSION_TYPES = [UpdateType.FEEDBACK.value, UpdateType.FOLLOWUP.value]
 
 SES_SOURCE_EMAIL = "GP-TA <noreply@gp-ta.ca>"
+# maximum emails per second allowed by our SES account
+SES_MAX_SEND_RATE = 14
 SES_RECIPIENT_EMAIL = os.environ["SES_RECP_EMAIL"]
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class PostBlob:
+    """A single piece of a Piazza post (question, answer, followup, etc.)"""
+
+    content: str
+    date: str
+    post_num: int
+    id: str
+    parent_id: str
+    type: str
+    is_endorsed: str
+    root_id: str
+    title: str
+    person_id: str
+    person_name: str
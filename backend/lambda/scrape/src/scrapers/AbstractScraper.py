@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
 
 import boto3
+from botocore.config import Config
 from config.constants import (
     CHUNKS_TABLE_NAME,
     DIFFS_TABLE_NAME,
+    MAX_COURSE_WORKERS,
+    MAX_WORKERS,
     PINECONE_INDEX_NAME,
     POSTS_TABLE_NAME,
     SECRETS,
@@ -26,7 +29,11 @@ class AbstractScraper(ABC):
         self.piazza.user_login(email=piazza_username, password=piazza_password)
         logger.debug("Authenticated to Piazza API")
 
-        dynamodb = boto3.resource("dynamodb")
+        # every course thread runs its own PostManager pool against this one resource, so size
+        # the connection pool (botocore defaults to 10) for all of them at once
+        dynamodb = boto3.resource(
+            "dynamodb", config=Config(max_pool_connections=MAX_COURSE_WORKERS * MAX_WORKERS)
+        )
         chunks_table = dynamodb.Table(CHUNKS_TABLE_NAME)
         posts_table = dynamodb.Table(POSTS_TABLE_NAME)
         diffs_table = dynamodb.Table(DIFFS_TABLE_NAME)
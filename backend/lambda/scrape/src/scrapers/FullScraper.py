@@ -1,15 +1,29 @@
+import time
+from collections.abc import Iterator
+
+import requests
 from aws_lambda_powertools.metrics import MetricUnit
-from config.constants import IGNORED_COURSE_IDS
+from config.constants import (
+    IGNORED_COURSE_IDS,
+    PIAZZA_BACKOFF_SECONDS,
+    PIAZZA_MAX_ATTEMPTS,
+    PIAZZA_MIN_REQUEST_INTERVAL,
+)
 from config.logger import logger
 from config.metrics import metrics
+from piazza_api.exceptions import RequestError
+from piazza_api.network import Network
 from scrapers.AbstractScraper import AbstractScraper
 from scrapers.core.PiazzaDataExtractor import PiazzaDataExtractor
-from scrapers.core.TextProcessor import TextProcessor
+
+# what Piazza's error body says when it is rate limiting us
+_THROTTLE_MARKERS = ("too many requests", "rate limit")
 
 
 class FullScraper(AbstractScraper):
     def __init__(self):
         super().__init__()
+        self._next_request_time = 0.0
 
     def scrape(self, event: dict) -> dict:
         try:
@@ -20,6 +34,53 @@ class FullScraper(AbstractScraper):
 
         self.scrape_course(course_id)
 
+    def _wait_for_request_slot(self) -> None:
+        """Space out Piazza requests, only sleeping for whatever time processing didn't use"""
+        now = time.monotonic()
+        wait = self._next_request_time - now
+        self._next_request_time = max(now, self._next_request_time) + PIAZZA_MIN_REQUEST_INTERVAL
+
+        if wait > 0:
+            time.sleep(wait)
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Whether a failed Piazza request is worth retrying"""
+        if isinstance(error, RequestError):
+            # Piazza also answers with an error body for deleted or forbidden posts; only
+            # throttling goes away by waiting
+            message = str(error).lower()
+            return any(marker in message for marker in _THROTTLE_MARKERS)
+        # a body that isn't JSON at all is a gateway or rate-limit page, not an API answer
+        return isinstance(error, (ValueError, requests.ConnectionError, requests.Timeout))
+
+    def _fetch_post(self, network: Network, post_id: str) -> dict:
+        """Fetch one post, backing off exponentially if Piazza throttles the request"""
+        for attempt in range(PIAZZA_MAX_ATTEMPTS):
+            self._wait_for_request_slot()
+            try:
+                return network.get_post(post_id)
+            except Exception as e:
+                if attempt == PIAZZA_MAX_ATTEMPTS - 1 or not self._is_transient(e):
+                    raise
+                delay = PIAZZA_BACKOFF_SECONDS * 2**attempt
+                logger.warning(
+                    "Piazza request failed, backing off",
+                    extra={"post_id": post_id, "attempt": attempt + 1, "delay": delay},
+                )
+                time.sleep(delay)
+
+    def iter_all_posts(self, network: Network) -> Iterator[dict]:
+        """Yield every post in the course's feed.
+
+        Replaces network.iter_all_posts(sleep=1), which sleeps a full second before every
+        post no matter how long we then spend processing it.
+        """
+        self._wait_for_request_slot()
+        feed = network.get_feed(limit=999999, offset=0)
+        for feed_item in feed["feed"]:
+            yield self._fetch_post(network, feed_item["id"])
+
     def scrape_course(self, course_id: str) -> dict:
         """Main scrape function"""
         # Skip ignored courses
@@ -35,18 +96,10 @@ class FullScraper(AbstractScraper):
             extractor = PiazzaDataExtractor(network)
 
             # Process each post in the given course
-            for post in network.iter_all_posts(limit=None, sleep=1):
-                post_chunks = []
-
-                # Extract all blobs from the post
-                blobs = extractor.extract_all_post_blobs(post)
-
-                # Generate chunks for each blob
-                for blob in blobs:
-                    text_chunks = TextProcessor.generate_chunks(blob)
-                    for idx, chunk_text in enumerate(text_chunks):
-                        chunk = self.chunk_manager.create_chunk(blob, idx, chunk_text, course_id)
-                        post_chunks.append(chunk)
+            for post in self.iter_all_posts(network):
+                # Extract all blobs from the post and generate chunks for each blob
+                extractor.prime_user_cache([post])
+                post_chunks = self.chunk_manager.iter_post_chunks(extractor, post, course_id)
                 # this actually does the upsert to Pinecone and store to DynamoDB
                 self.chunk_manager.process_post_chunks(post_chunks)
                 processed_posts += 1
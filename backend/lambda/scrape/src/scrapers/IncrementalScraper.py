@@ -1,13 +1,13 @@
+import concurrent.futures
 import json
 
 import boto3
 from aws_lambda_powertools.metrics import MetricUnit
-from config.constants import AWS_REGION_NAME, IGNORED_COURSE_IDS
+from config.constants import AWS_REGION_NAME, IGNORED_COURSE_IDS, MAX_COURSE_WORKERS
 from config.logger import logger
 from config.metrics import metrics
 from scrapers.AbstractScraper import AbstractScraper
 from scrapers.core.PiazzaDataExtractor import PiazzaDataExtractor
-from scrapers.core.TextProcessor import TextProcessor
 
 SQS_QUEUE_URL = "https://sqs.us-west-2.amazonaws.com/112745307245/PiazzaUpdateQueue"
 
@@ -53,6 +53,77 @@ class IncrementalScraper(AbstractScraper):
         logger.info("Fetched SQS messages", extra={"message_count": len(all_messages)})
         return all_messages
 
+    def scrape_course(
+        self, course_id: str, post_ids: list[str], postid_to_msg: dict[str, dict]
+    ) -> tuple[int, int]:
+        """Process the queued posts for one course, returning (processed, failed) counts"""
+        # SQS can deliver several messages for the same post. Process each post once: a second
+        # pass would still see the prefetched (stale or missing) row and redo the writes
+        post_ids = list(dict.fromkeys(post_ids))
+        logger.info(
+            "Processing incremental updates for course",
+            extra={"course_id": course_id, "post_count": len(post_ids)},
+        )
+        network = self.piazza.network(course_id)
+        extractor = PiazzaDataExtractor(network)
+
+        processed_posts = 0
+        failed_posts = 0
+        # posts whose chunks are stored, waiting on the raw post logic
+        fetched_posts = {}
+        for post_id in post_ids:
+            try:
+                post = network.get_post(post_id)
+
+                if post.get("status") == "deleted":
+                    logger.warning(
+                        "Skipping post - post already deleted",
+                        extra={"post_id": post_id, "course_id": course_id},
+                    )
+                    self.sqs.delete_message(
+                        QueueUrl=SQS_QUEUE_URL,
+                        ReceiptHandle=postid_to_msg[post_id]["ReceiptHandle"],
+                    )
+                    continue
+
+                extractor.prime_user_cache([post])
+                post_chunks = self.chunk_manager.iter_post_chunks(extractor, post, course_id)
+
+                # this actually does the upsert to Pinecone and store to DynamoDB
+                self.chunk_manager.process_post_chunks(post_chunks)
+                fetched_posts[post_id] = post
+
+            except Exception:
+                failed_posts += 1
+                logger.exception(
+                    "Failed processing post", extra={"post_id": post_id, "course_id": course_id}
+                )
+
+        # handle the raw post logic (for summarization); PostManager spreads the DynamoDB
+        # writes over a thread pool and logs any post that fails
+        failed_ids = set(self.post_manager.process_posts(list(fetched_posts.values()), course_id))
+
+        for post_id, post in fetched_posts.items():
+            if str(post.get("id")) in failed_ids:
+                failed_posts += 1
+                continue
+
+            # Delete SQS message after successful processing of the post
+            try:
+                self.sqs.delete_message(
+                    QueueUrl=SQS_QUEUE_URL, ReceiptHandle=postid_to_msg[post_id]["ReceiptHandle"]
+                )
+                logger.debug("Deleted SQS message", extra={"post_id": post_id})
+                processed_posts += 1
+            except Exception:
+                failed_posts += 1
+                logger.exception(
+                    "Failed to delete SQS message",
+                    extra={"post_id": post_id, "course_id": course_id},
+                )
+
+        return processed_posts, failed_posts
+
     def scrape(self, event: dict) -> dict:
         """Main scrape function"""
         # get pending messages from SQS and group them by their course
@@ -60,9 +131,7 @@ class IncrementalScraper(AbstractScraper):
         metrics.add_metric(name="ScrapeSqsMessages", unit=MetricUnit.Count, value=len(messages))
         grouped, postid_to_msg = self.group_messages_by_course(messages)
 
-        # Process each course at a time
-        processed_posts = 0
-        failed_posts = 0
+        courses_to_scrape = {}
         for course_id, post_ids in grouped.items():
             # Skip ignored courses
             if course_id in IGNORED_COURSE_IDS:
@@ -84,56 +153,24 @@ class IncrementalScraper(AbstractScraper):
                         )
                 continue
 
-            logger.info(
-                "Processing incremental updates for course",
-                extra={"course_id": course_id, "post_count": len(post_ids)},
-            )
-            network = self.piazza.network(course_id)
-            extractor = PiazzaDataExtractor(network)
-            for post_id in post_ids:
-                sqs_msg = postid_to_msg[post_id]
-                try:
-                    post_chunks = []
-                    post = network.get_post(post_id)
-
-                    if post.get("status") == "deleted":
-                        logger.warning(
-                            "Skipping post - post already deleted",
-                            extra={"post_id": post_id, "course_id": course_id},
-                        )
-                        self.sqs.delete_message(
-                            QueueUrl=SQS_QUEUE_URL, ReceiptHandle=sqs_msg["ReceiptHandle"]
-                        )
-                        continue
-
-                    blobs = extractor.extract_all_post_blobs(post)
+            courses_to_scrape[course_id] = post_ids
 
-                    for blob in blobs:
-                        text_chunks = TextProcessor.generate_chunks(blob)
-                        for idx, chunk_text in enumerate(text_chunks):
-                            chunk = self.chunk_manager.create_chunk(
-                                blob, idx, chunk_text, course_id
-                            )
-                            post_chunks.append(chunk)
-
-                    # this actually does the upsert to Pinecone and store to DynamoDB
-                    self.chunk_manager.process_post_chunks(post_chunks)
-
-                    # handle the raw post logic (for summarization)
-                    self.post_manager.process_post(post, course_id)
-
-                    # Delete SQS message after successful processing of the post
-                    self.sqs.delete_message(
-                        QueueUrl=SQS_QUEUE_URL, ReceiptHandle=sqs_msg["ReceiptHandle"]
-                    )
-                    logger.debug("Deleted SQS message", extra={"post_id": post_id})
-                    processed_posts += 1
-
-                except Exception:
-                    failed_posts += 1
-                    logger.exception(
-                        "Failed processing post", extra={"post_id": post_id, "course_id": course_id}
-                    )
+        # courses are independent and almost all of the time goes to waiting on Piazza, so
+        # overlap them; the Piazza session, boto3 clients and ChunkManager are shared
+        processed_posts = 0
+        failed_posts = 0
+        if courses_to_scrape:
+            max_workers = min(MAX_COURSE_WORKERS, len(courses_to_scrape))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self.scrape_course, course_id, post_ids, postid_to_msg)
+                    for course_id, post_ids in courses_to_scrape.items()
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    # per-post failures are already counted inside scrape_course
+                    course_processed, course_failed = future.result()
+                    processed_posts += course_processed
+                    failed_posts += course_failed
 
         total_chunks = self.chunk_manager.finalize()
         logger.info(
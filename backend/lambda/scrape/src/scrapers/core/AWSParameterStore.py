@@ -1,21 +1,52 @@
+import time
+from functools import cache
+
 import boto3
 from botocore.exceptions import ClientError
-from config.constants import AWS_REGION_NAME, SECRETS
+from config.constants import AWS_REGION_NAME, PARAMETER_CACHE_TTL_SECONDS, SECRETS
 from config.logger import logger
 
+# decrypted values kept across warm invocations: name -> (value, time fetched)
+_parameter_cache: dict[str, tuple[str, float]] = {}
+
+
+@cache
+def _ssm_client():
+    return boto3.session.Session().client(service_name="ssm", region_name=AWS_REGION_NAME)
+
 
 class AWSParameterStore:
     """Handles AWS Parameter Store operations"""
 
     def __init__(self):
-        self.session = boto3.session.Session()
-        self.client = self.session.client(service_name="ssm", region_name=AWS_REGION_NAME)
+        self.client = _ssm_client()
+
+    def _get_parameters(self, names: list[str]) -> dict[str, str]:
+        """Return the named parameters, only calling SSM for ones missing or older than the TTL"""
+        now = time.monotonic()
+        values = {}
+        for name in names:
+            cached = _parameter_cache.get(name)
+            if cached and now - cached[1] < PARAMETER_CACHE_TTL_SECONDS:
+                values[name] = cached[0]
+
+        missing = [name for name in names if name not in values]
+        if missing:
+            response = self.client.get_parameters(Names=missing, WithDecryption=True)
+            if response["InvalidParameters"]:
+                raise RuntimeError(
+                    f"Secrets missing from Parameter Store: {response['InvalidParameters']}"
+                )
+            for parameter in response["Parameters"]:
+                _parameter_cache[parameter["Name"]] = (parameter["Value"], now)
+                values[parameter["Name"]] = parameter["Value"]
+
+        return values
 
     def get_secret_api_key(self, secret_name: str) -> str:
         """Retrieve API key from AWS Parameter Store."""
         try:
-            response = self.client.get_parameter(Name=secret_name, WithDecryption=True)
-            return response["Parameter"]["Value"]
+            return self._get_parameters([secret_name])[secret_name]
         except ClientError as e:
             logger.exception("Failed to retrieve secret", extra={"secret_name": secret_name})
             raise RuntimeError(f"Failed to retrieve credentials from Parameter Store: {e}") from e
@@ -32,10 +63,9 @@ class AWSParameterStore:
     ) -> tuple[str, str]:
         """Get Piazza username and password from AWS Parameter Store"""
         try:
-            username_response = self.client.get_parameter(Name=username_secret, WithDecryption=True)
-            password_response = self.client.get_parameter(Name=password_secret, WithDecryption=True)
-            username = username_response["Parameter"]["Value"]
-            password = password_response["Parameter"]["Value"]
+            values = self._get_parameters([username_secret, password_secret])
+            username = values[username_secret]
+            password = values[password_secret]
 
             logger.info("Retrieved Piazza credentials from Parameter Store")
             return username, password
@@ -1,3 +1,6 @@
+import threading
+from collections.abc import Iterable, Iterator
+from itertools import islice
 from typing import Any
 
 from config.constants import (
@@ -7,7 +10,9 @@ from config.constants import (
     PINECONE_NAMESPACE,
 )
 from config.logger import logger
+from dto.PostBlob import PostBlob
 from pinecone import Pinecone
+from scrapers.core.PiazzaDataExtractor import PiazzaDataExtractor
 from scrapers.core.TextProcessor import TextProcessor
 
 
@@ -25,34 +30,45 @@ class ChunkManager:
         self.chunk_dynamo_table = chunk_dynamo_table
         self.pinecone_batch = []
         self.chunk_count = 0
+        # IncrementalScraper feeds chunks from several courses at once
+        self._batch_lock = threading.Lock()
 
-    def create_chunk(self, blob: dict, chunk_index: int, chunk_text: str, course_id: str) -> dict:
+    def create_chunk(
+        self, blob: PostBlob, chunk_index: int, chunk_text: str, course_id: str
+    ) -> dict:
         """Create a chunk dictionary from blob data"""
         content_hash = TextProcessor.compute_hash(chunk_text)
 
         return {
-            "id": f"{blob['id']}#{chunk_index}",
+            "id": f"{blob.id}#{chunk_index}",
             "class_id": course_id,  # keep this as class_id for now for backwards compatibility
-            "blob_id": blob["id"],
+            "blob_id": blob.id,
             "chunk_index": chunk_index,
-            "root_id": blob["root_id"],
-            "parent_id": blob["parent_id"],
-            "root_post_num": blob["post_num"],
-            "is_endorsed": blob["is_endorsed"],
-            "person_id": blob["person_id"],
-            "person_name": blob["person_name"],
-            "type": blob["type"],
-            "title": blob["title"],
-            "date": blob["date"],
+            "root_id": blob.root_id,
+            "parent_id": blob.parent_id,
+            "root_post_num": blob.post_num,
+            "is_endorsed": blob.is_endorsed,
+            "person_id": blob.person_id,
+            "person_name": blob.person_name,
+            "type": blob.type,
+            "title": blob.title,
+            "date": blob.date,
             "content_hash": content_hash,
             "chunk_text": chunk_text,
         }
 
-    def process_post_chunks(self, post_chunks: list[dict]) -> None:
-        """Process chunks for a single post with deduplication"""
-        for i in range(0, len(post_chunks), DYNAMO_BATCH_GET_SIZE):
-            post_batch = post_chunks[i : i + DYNAMO_BATCH_GET_SIZE]
+    def iter_post_chunks(
+        self, extractor: PiazzaDataExtractor, post: dict, course_id: str
+    ) -> Iterator[dict]:
+        """Yield the chunks of every blob in a post as they are generated"""
+        for blob in extractor.extract_all_post_blobs(post):
+            for idx, chunk_text in enumerate(TextProcessor.generate_chunks(blob)):
+                yield self.create_chunk(blob, idx, chunk_text, course_id)
 
+    def process_post_chunks(self, post_chunks: Iterable[dict]) -> None:
+        """Process chunks for a single post with deduplication"""
+        post_chunks = iter(post_chunks)
+        while post_batch := list(islice(post_chunks, DYNAMO_BATCH_GET_SIZE)):
             # Check for existing chunks in DynamoDB
             existing_chunks = self._get_existing_chunks(post_batch)
 
@@ -83,11 +99,13 @@ class ChunkManager:
                 continue
 
             chunks_to_insert.append(chunk)
-            self.pinecone_batch.append(chunk)
-            self.chunk_count += 1
+            with self._batch_lock:
+                self.pinecone_batch.append(chunk)
+                self.chunk_count += 1
+                batch_full = len(self.pinecone_batch) >= PINECONE_BATCH_SIZE
 
             # Flush Pinecone batch if needed
-            if len(self.pinecone_batch) >= PINECONE_BATCH_SIZE:
+            if batch_full:
                 self._flush_pinecone_batch()
 
         return chunks_to_insert
@@ -100,17 +118,22 @@ class ChunkManager:
                 logger.debug("Inserted or updated chunk", extra={"chunk_id": chunk["id"]})
 
         # Flush Pinecone batch after DynamoDB write
-        if self.pinecone_batch:
-            self._flush_pinecone_batch()
+        self._flush_pinecone_batch()
 
     def _flush_pinecone_batch(self) -> None:
         """Flush current batch to Pinecone"""
-        if self.pinecone_batch:
-            self.pinecone_index.upsert_records(PINECONE_NAMESPACE, self.pinecone_batch)
-            logger.info(
-                "Upserted chunks to Pinecone", extra={"chunk_count": len(self.pinecone_batch)}
-            )
-            self.pinecone_batch = []
+        # take the batch under the lock but upsert outside it, so other threads keep queueing
+        with self._batch_lock:
+            batch, self.pinecone_batch = self.pinecone_batch, []
+        if batch:
+            try:
+                self.pinecone_index.upsert_records(PINECONE_NAMESPACE, batch)
+            except Exception:
+                # put it back so a later flush retries it, as before
+                with self._batch_lock:
+                    self.pinecone_batch[:0] = batch
+                raise
+            logger.info("Upserted chunks to Pinecone", extra={"chunk_count": len(batch)})
 
     def finalize(self) -> int:
         """Flush any remaining chunks and return count"""
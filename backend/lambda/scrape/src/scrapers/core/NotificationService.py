@@ -1,35 +1,143 @@
 import html
 import re
-from html.parser import HTMLParser
+import threading
+import time
+from urllib.parse import unquote
 
 import boto3
-from config.constants import AWS_REGION_NAME, SES_SOURCE_EMAIL
+from botocore.config import Config
+from config.constants import AWS_REGION_NAME, SES_MAX_SEND_RATE, SES_SOURCE_EMAIL
 from config.logger import logger
 from dto.AnnouncementPostConfig import AnnouncementPostConfig
 from dto.NotificationConfig import NotificationConfig
 
+# Shared across warm invocations so SES connections (and their TLS sessions) get reused
+_SES = boto3.client(
+    "ses",
+    region_name=AWS_REGION_NAME,
+    config=Config(
+        max_pool_connections=SES_MAX_SEND_RATE,
+        retries={"max_attempts": 3, "mode": "adaptive"},
+        tcp_keepalive=True,
+    ),
+)
 
-class HTMLTextExtractor(HTMLParser):
-    """Extract plain text from HTML content"""
+# like HTMLParser, only treat "<" as a tag when a name, "/", "!" or "?" follows it, so decoded
+# text such as "x < y" survives
+_TAG_RE = re.compile(r"<[A-Za-z/!?][^>]*>")
+_IMG_RE = re.compile(r"<img[^>]*>", re.IGNORECASE)
+_PREFIX_RE = re.compile(r'prefix=([^&"\'>\s]+)')
+_SRC_RE = re.compile(r'src=["\'][^"\']*["\']')
+_IFRAME_CLOSE = "</iframe>"
+# str.lower() can change a string's length (e.g. "İ"), which would break the index scans in
+# _strip_iframes, so only fold ASCII letters
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_IFRAME_REPLACEMENT = (
+    '<span style="color: #666; font-style: italic;">[Embedded content - view on Piazza]</span>'
+)
+_ESC_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+_WS_RE = re.compile(r"\s+")
+# the plain-text body only previews the announcement
+_TEXT_BODY_MAX_LENGTH = 500
 
-    def __init__(self) -> None:
-        super().__init__()
-        self.text = []
+# The email shell never changes, so build it once instead of per email
+_HTML_HEAD = """<html>
+<head>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333333;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        .announcement-content {
+            background-color: #ffffff;
+            padding: 20px;
+            border-left: 4px solid #1a73e8;
+            margin: 20px 0;
+        }
+        .content-notice {
+            background-color: #fff3cd;
+            border-left: 4px solid #ffc107;
+            padding: 12px;
+            margin: 15px 0;
+            font-size: 14px;
+        }
+        .cta-button {
+            display: inline-block;
+            background-color: #1a73e8;
+            color: white !important;
+            padding: 12px 24px;
+            text-decoration: none;
+            border-radius: 5px;
+            margin-top: 20px;
+        }
+        .cta-button:hover {
+            background-color: #1557b0;
+            text-decoration: none;
+        }
+        a {
+            color: #1a73e8;
+            text-decoration: none;
+        }
+        a:hover {
+            text-decoration: underline;
+        }
+    </style>
+</head>
+<body>
+"""
+_HTML_TAIL = """</body>
+</html>
+"""
+
+
+def _esc(text: str) -> str:
+    """Escape text for HTML in a single pass (same output as html.escape)"""
+    return text.translate(_ESC_TABLE)
+
+
+def _replace_image_src(match: re.Match[str]) -> str:
+    """Point an img tag's src at the Piazza CDN instead of the auth-only redirect URL"""
+    img_tag = match.group(0)
+    # Extract the prefix parameter from redirect URL
+    prefix_match = _PREFIX_RE.search(img_tag)
+    if prefix_match:
+        # URL decode the prefix (handles %2F -> /)
+        prefix = unquote(prefix_match.group(1))
+        # Replace the src attribute with the direct CDN URL
+        cdn_url = f"https://cdn-uploads.piazza.com/{prefix}"
+        img_tag = _SRC_RE.sub(f'src="{cdn_url}"', img_tag)
+    return img_tag
 
-    def handle_data(self, data: str) -> None:
-        self.text.append(data)
 
-    def get_text(self) -> str:
-        # Join and normalize whitespace
-        text = "".join(self.text)
-        text = re.sub(r"\s+", " ", text)
-        return text.strip()
+def _strip_iframes(content: str, lowered: str) -> str:
+    """Replace each closed <iframe>...</iframe> with a placeholder using plain index scans"""
+    out = []
+    pos = 0
+    while True:
+        start = lowered.find("<iframe", pos)
+        if start == -1:
+            break
+        end = lowered.find(_IFRAME_CLOSE, start)
+        if end == -1:
+            # unclosed iframes are left as-is
+            break
+        out.append(content[pos:start])
+        out.append(_IFRAME_REPLACEMENT)
+        pos = end + len(_IFRAME_CLOSE)
+
+    out.append(content[pos:])
+    return "".join(out)
 
 
 class NotificationService:
     def __init__(self) -> None:
-        self.ssm_client = boto3.client("ssm")
-        self.ses = boto3.client("ses", region_name=AWS_REGION_NAME)
+        self.ses = _SES
+        self._send_lock = threading.Lock()
+        self._next_send_time = 0.0
 
     def send_email_notification(
         self,
@@ -37,22 +145,33 @@ class NotificationService:
         announcement: AnnouncementPostConfig,
     ) -> bool:
         """Send email notification via SES"""
-        subject = f"Piazza announcement @{announcement.post_number} for {announcement.course_name}"
+        message = NotificationService._build_message(announcement)
+        return self._send_message(config, announcement, message)
+
+    def _wait_for_send_slot(self) -> None:
+        """Space out sends so we stay under the SES account send rate"""
+        # PostManager handles new posts on several threads, so sends can overlap
+        with self._send_lock:
+            now = time.monotonic()
+            wait = self._next_send_time - now
+            self._next_send_time = max(now, self._next_send_time) + 1 / SES_MAX_SEND_RATE
 
-        text_body = NotificationService._build_text_body(announcement)
-        html_body = NotificationService._build_html_body(announcement)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _send_message(
+        self,
+        config: NotificationConfig,
+        announcement: AnnouncementPostConfig,
+        message: dict,
+    ) -> bool:
+        self._wait_for_send_slot()
 
         try:
             self.ses.send_email(
                 Source=f"{announcement.course_name} on {SES_SOURCE_EMAIL}",
                 Destination={"ToAddresses": [config.recipient_email]},
-                Message={
-                    "Subject": {"Data": subject, "Charset": "UTF-8"},
-                    "Body": {
-                        "Text": {"Data": text_body, "Charset": "UTF-8"},
-                        "Html": {"Data": html_body, "Charset": "UTF-8"},
-                    },
-                },
+                Message=message,
             )
             logger.info(
                 "Sent announcement email",
@@ -78,59 +197,88 @@ class NotificationService:
             return False
 
     @staticmethod
-    def _sanitize_html_content(content: str) -> str:
-        """Convert Piazza redirect image URLs to direct CDN URLs"""
-        # Decode HTML entities first
-        content = html.unescape(content)
-
-        # Convert Piazza redirect URLs to direct CDN URLs
-        def replace_image_src(match: re.Match[str]) -> str:
-            img_tag = match.group(0)
-            # Extract the prefix parameter from redirect URL
-            prefix_match = re.search(r'prefix=([^&"\'>\s]+)', img_tag)
-            if prefix_match:
-                # URL decode the prefix (handles %2F -> /)
-                from urllib.parse import unquote
-
-                prefix = unquote(prefix_match.group(1))
-                # Replace with direct CDN URL
-                cdn_url = f"https://cdn-uploads.piazza.com/{prefix}"
-                # Replace the src attribute
-                img_tag = re.sub(r'src=["\'][^"\']*["\']', f'src="{cdn_url}"', img_tag)
-            return img_tag
-
-        # Process all img tags
-        content = re.sub(r"<img[^>]*>", replace_image_src, content, flags=re.IGNORECASE)
-
-        # Still handle iframes as they likely need auth
-        content = re.sub(
-            r"<iframe[^>]*>.*?</iframe>",
-            '<span style="color: #666; font-style: italic;">[Embedded content - view on Piazza]</span>',
-            content,
-            flags=re.IGNORECASE | re.DOTALL,
+    def _build_message(announcement: AnnouncementPostConfig) -> dict:
+        """Build the SES message (subject, text and HTML bodies) for an announcement"""
+        subject = f"Piazza announcement @{announcement.post_number} for {announcement.course_name}"
+
+        # decode and process the content once and share the results between both bodies
+        decoded_subject = html.unescape(announcement.post_subject)
+        decoded_content = html.unescape(announcement.post_content)
+
+        # content without any markup doesn't need the (much larger) HTML body, as long as the
+        # text body won't truncate it; otherwise the HTML part is the only full copy
+        if "<" not in decoded_content:
+            plain_content = _WS_RE.sub(" ", decoded_content).strip()
+            if len(plain_content) <= _TEXT_BODY_MAX_LENGTH:
+                text_body = NotificationService._build_text_body(
+                    announcement, decoded_subject, plain_content
+                )
+                return {
+                    "Subject": {"Data": subject, "Charset": "UTF-8"},
+                    "Body": {"Text": {"Data": text_body, "Charset": "UTF-8"}},
+                }
+
+        sanitized_content, plain_content = NotificationService._process_content(decoded_content)
+
+        text_body = NotificationService._build_text_body(
+            announcement, decoded_subject, plain_content
+        )
+        html_body = NotificationService._build_html_body(
+            announcement, decoded_subject, sanitized_content
         )
 
+        return {
+            "Subject": {"Data": subject, "Charset": "UTF-8"},
+            "Body": {
+                "Text": {"Data": text_body, "Charset": "UTF-8"},
+                "Html": {"Data": html_body, "Charset": "UTF-8"},
+            },
+        }
+
+    @staticmethod
+    def _sanitize_html_content(content: str) -> str:
+        """Convert Piazza redirect image URLs to direct CDN URLs (expects decoded content)"""
+        # Most announcements have no embedded media, so skip the regex passes entirely
+        lowered = content.translate(_ASCII_LOWER)
+        if "<img" not in lowered and "<iframe" not in lowered:
+            return content
+
+        # Still handle iframes as they likely need auth. This runs first so it can reuse `lowered`
+        if "<iframe" in lowered:
+            content = _strip_iframes(content, lowered)
+
+        # Convert Piazza redirect URLs to direct CDN URLs in all img tags
+        content = _IMG_RE.sub(_replace_image_src, content)
+
         return content
 
     @staticmethod
-    def _build_text_body(announcement: AnnouncementPostConfig) -> str:
+    def _process_content(decoded_content: str) -> tuple[str, str]:
+        """Return the sanitized HTML and the whitespace-normalized plain text of a post"""
+        sanitized_content = NotificationService._sanitize_html_content(decoded_content)
+
+        # strip tags (without adding spaces, so inline markup doesn't split words from their
+        # punctuation) and normalize whitespace
+        plain_content = _TAG_RE.sub("", decoded_content)
+        plain_content = _WS_RE.sub(" ", plain_content).strip()
+
+        return sanitized_content, plain_content
+
+    @staticmethod
+    def _build_text_body(
+        announcement: AnnouncementPostConfig, decoded_subject: str, plain_content: str
+    ) -> str:
         """Build plain text email body for course announcement"""
         post_url = f"https://piazza.com/class/{announcement.course_id}/post/{announcement.post_id}"
 
-        extractor = HTMLTextExtractor()
-        decoded_content = html.unescape(announcement.post_content)
-        extractor.feed(decoded_content)
-        plain_content = extractor.get_text()
-
         # truncate if too long
-        max_length = 500
-        if len(plain_content) > max_length:
-            plain_content = plain_content[:max_length].rsplit(" ", 1)[0] + "..."
+        if len(plain_content) > _TEXT_BODY_MAX_LENGTH:
+            plain_content = plain_content[:_TEXT_BODY_MAX_LENGTH].rsplit(" ", 1)[0] + "..."
 
         return (
             f"Hello,\n\n"
             f"A new course announcement has been posted in {announcement.course_name}.\n\n"
-            f"Subject: {html.unescape(announcement.post_subject)}\n\n"
+            f"Subject: {decoded_subject}\n\n"
             f"{plain_content}\n"
             f"View the full announcement here: {post_url}\n\n"
             f"Happy learning!\n"
@@ -138,73 +286,21 @@ class NotificationService:
         )
 
     @staticmethod
-    def _build_html_body(announcement: AnnouncementPostConfig) -> str:
+    def _build_html_body(
+        announcement: AnnouncementPostConfig, decoded_subject: str, sanitized_content: str
+    ) -> str:
         """Build HTML email body for course announcement"""
         post_url = f"https://piazza.com/class/{announcement.course_id}/post/{announcement.post_id}"
 
-        decoded_subject = html.unescape(announcement.post_subject)
-        decoded_content = NotificationService._sanitize_html_content(announcement.post_content)
-
-        return f"""
-                <html>
-                <head>
-                    <style>
-                        body {{
-                            font-family: Arial, sans-serif;
-                            line-height: 1.6;
-                            color: #333333;
-                            max-width: 800px;
-                            margin: 0 auto;
-                            padding: 20px;
-                        }}
-                        .announcement-content {{
-                            background-color: #ffffff;
-                            padding: 20px;
-                            border-left: 4px solid #1a73e8;
-                            margin: 20px 0;
-                        }}
-                        .content-notice {{
-                            background-color: #fff3cd;
-                            border-left: 4px solid #ffc107;
-                            padding: 12px;
-                            margin: 15px 0;
-                            font-size: 14px;
-                        }}
-                        .cta-button {{
-                            display: inline-block;
-                            background-color: #1a73e8;
-                            color: white !important;
-                            padding: 12px 24px;
-                            text-decoration: none;
-                            border-radius: 5px;
-                            margin-top: 20px;
-                        }}
-                        .cta-button:hover {{
-                            background-color: #1557b0;
-                            text-decoration: none;
-                        }}
-                        a {{
-                            color: #1a73e8;
-                            text-decoration: none;
-                        }}
-                        a:hover {{
-                            text-decoration: underline;
-                        }}
-                    </style>
-                </head>
-                <body>
-
-                    <p>Hello,</p>
-                    <p>A new announcement has been posted in <strong>{html.escape(announcement.course_name)}</strong>:</p>
-
-                    <div class="announcement-content">
-                        <h3 style="margin-top: 0;">{html.escape(decoded_subject)}</h3>
-                        {decoded_content}
-                    </div>
-
-                    <a href="{post_url}" class="cta-button">View Full Announcement on Piazza</a>
-
-                    <p style="margin-top: 30px;">Happy learning!<br>- The GP-TA Team</p>
-                </body>
-                </html>
-                """
+        return (
+            f"{_HTML_HEAD}"
+            "<p>Hello,</p>\n"
+            f"<p>A new announcement has been posted in <strong>{_esc(announcement.course_name)}</strong>:</p>\n"
+            '<div class="announcement-content">\n'
+            f'<h3 style="margin-top: 0;">{_esc(decoded_subject)}</h3>\n'
+            f"{sanitized_content}\n"
+            "</div>\n"
+            f'<a href="{post_url}" class="cta-button">View Full Announcement on Piazza</a>\n'
+            '<p style="margin-top: 30px;">Happy learning!<br>- The GP-TA Team</p>\n'
+            f"{_HTML_TAIL}"
+        )
@@ -1,9 +1,51 @@
+from collections.abc import Iterator
 from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
+from dto.PostBlob import PostBlob
 from piazza_api.network import Network
 from scrapers.core.TextProcessor import TextProcessor
 
+_UTC = ZoneInfo("UTC")
+_NO_HISTORY = ({},)
+
+try:
+    # C parser, much faster than fromisoformat and handles the trailing "Z" natively
+    from ciso8601 import parse_datetime
+except ImportError:
+
+    def parse_datetime(date_str: str) -> datetime:
+        if date_str.endswith("Z"):
+            date_str = date_str[:-1] + "+00:00"
+        return datetime.fromisoformat(date_str)
+
+
+# Sibling posts frequently share timestamps, so remember the normalized form
+@lru_cache(maxsize=8192)
+def _normalize_piazza_date(date_str: str) -> str:
+    """Normalize Piazza date string to ISO 8601 format with timezone.
+
+    Piazza dates may come in various formats. This ensures consistent ISO format.
+    """
+    if not date_str:
+        return ""
+
+    try:
+        # Try parsing as ISO format (Piazza typically uses ISO with Z)
+        dt = parse_datetime(date_str)
+
+        # Ensure timezone info exists
+        if dt.tzinfo is None:
+            # Assume UTC if no timezone info
+            dt = dt.replace(tzinfo=_UTC)
+
+        # Return in ISO format
+        return dt.isoformat()
+    except (ValueError, AttributeError):
+        # If parsing fails, return as-is (better than crashing)
+        return date_str
+
 
 class PiazzaDataExtractor:
     """Handles Piazza data extraction and processing"""
@@ -12,55 +54,89 @@ class PiazzaDataExtractor:
         self.network = network
         self.person_name_cache = {}
 
-    @staticmethod
-    def _normalize_piazza_date(date_str: str) -> str:
-        """Normalize Piazza date string to ISO 8601 format with timezone.
-
-        Piazza dates may come in various formats. This ensures consistent ISO format.
-        """
-        if not date_str:
-            return ""
-
-        try:
-            # Try parsing as ISO format (Piazza typically uses ISO with Z)
-            if date_str.endswith("Z"):
-                dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-            else:
-                dt = datetime.fromisoformat(date_str)
-
-            # Ensure timezone info exists
-            if dt.tzinfo is None:
-                # Assume UTC if no timezone info
-                dt = dt.replace(tzinfo=ZoneInfo("UTC"))
-
-            # Return in ISO format
-            return dt.isoformat()
-        except (ValueError, AttributeError):
-            # If parsing fails, return as-is (better than crashing)
-            return date_str
-
     @staticmethod
     def is_endorsed(post: dict) -> bool:
         """Check if a post is endorsed by an instructor"""
-        endorsements = post.get("tag_endorse", [])
-        for endorsement in endorsements:
-            if endorsement.get("admin", False):
-                return True
-        return False
+        return any(endorsement.get("admin", False) for endorsement in post.get("tag_endorse", ()))
 
     def get_name_from_userid(self, userid: str) -> str:
         """Get user name from user ID with caching"""
-        if userid == "":
+        if not userid:
             return "Anonymous"
-        if userid in self.person_name_cache:
-            return self.person_name_cache[userid]
+
+        cache = self.person_name_cache
+        try:
+            return cache[userid]
+        except KeyError:
+            pass
 
         user = self.network.get_users([userid])[0]
         if user:
-            self.person_name_cache[userid] = user.get("name", "Unknown User")
-            return self.person_name_cache[userid]
+            name = cache[userid] = user.get("name", "Unknown User")
+            return name
         return "Unknown User"
 
+    @staticmethod
+    def _collect_uids(post: dict, uids: set[str]) -> None:
+        """Collect the author ids of a post and all of its children"""
+        stack = [post]
+        while stack:
+            node = stack.pop()
+            # only the latest revision's author ends up on a blob
+            uid = (node.get("history") or _NO_HISTORY)[0].get("uid")
+            if uid:
+                uids.add(uid)
+            stack.extend(node.get("children", ()))
+
+    def prime_user_cache(self, posts: list[dict]) -> None:
+        """Fetch the names of every unseen author in one request instead of one per author"""
+        uids = set()
+        for post in posts:
+            self._collect_uids(post, uids)
+        uids -= self.person_name_cache.keys()
+
+        if not uids:
+            return
+
+        for user in self.network.get_users(list(uids)):
+            if user:
+                self.person_name_cache[user["id"]] = user.get("name", "Unknown User")
+
+    def _make_blob(
+        self,
+        child: dict,
+        root_id: str,
+        root_title: str,
+        parent_id: str,
+        root_post_number: int,
+    ) -> PostBlob:
+        """Build the blob for a single child post"""
+        # an empty history list is treated like a missing one instead of raising IndexError
+        history_item = (child.get("history") or _NO_HISTORY)[0]
+
+        # only student answers can be endorsed
+        if child.get("type") == "s_answer":
+            is_endorsed = "yes" if self.is_endorsed(child) else "no"
+        else:
+            is_endorsed = "n/a"
+
+        return PostBlob(
+            # followups keep their text in "subject" rather than in a history entry
+            content=TextProcessor.clean_html_text(
+                history_item["content"] if "content" in history_item else child.get("subject", "")
+            ),
+            date=_normalize_piazza_date(history_item.get("created", child.get("created", ""))),
+            post_num=root_post_number,  # children get the same post number as root
+            id=child.get("id", ""),
+            parent_id=parent_id,
+            type=child.get("type", ""),
+            is_endorsed=is_endorsed,
+            root_id=root_id,
+            title=root_title,
+            person_id=history_item.get("uid", "anonymous"),
+            person_name=self.get_name_from_userid(history_item.get("uid", "")),
+        )
+
     def extract_children(
         self,
         children: list[dict],
@@ -68,81 +144,44 @@ class PiazzaDataExtractor:
         root_title: str,
         parent_id: str,
         root_post_number: int,
-    ) -> list[dict]:
-        """Recursively extract child posts (answers, followups, etc.)"""
-        blobs = []
-        for child in children:
-            history_item = child.get("history", [{}])[0]
-
-            blob_info = {
-                "content": TextProcessor.clean_html_text(
-                    history_item.get("content", "")
-                    if "content" in history_item
-                    else child.get("subject", "")
-                ),
-                "date": PiazzaDataExtractor._normalize_piazza_date(
-                    history_item.get("created", child.get("created", ""))
-                ),
-                "post_num": root_post_number,  # children get the same post number as root
-                "id": child.get("id", ""),
-                "parent_id": parent_id,
-                "type": child.get("type", ""),
-                "is_endorsed": "yes"
-                if (child.get("type") == "s_answer" and self.is_endorsed(child))
-                else "no"
-                if child.get("type") == "s_answer"
-                else "n/a",  # only student answers can be endorsed
-                "root_id": root_id,
-                "title": root_title,
-                "person_id": history_item.get("uid", "anonymous"),
-                "person_name": self.get_name_from_userid(history_item.get("uid", "")),
-            }
-
-            blobs.append(blob_info)
-
-            # Recursively process children
-            blobs.extend(
-                self.extract_children(
-                    child.get("children", []),
-                    root_id,
-                    root_title,
-                    blob_info["id"],
-                    root_post_number,
-                )
-            )
-        return blobs
-
-    def extract_all_post_blobs(self, post: dict) -> list[dict]:
-        """Extract all blobs (question + answers + followups) from a Piazza post"""
-        history_item = post.get("history", [{}])[0]
+    ) -> Iterator[PostBlob]:
+        """Yield child posts (answers, followups, etc.) in depth-first order"""
+        # explicit stack instead of recursion; children are pushed reversed so they pop in order
+        stack = [(child, parent_id) for child in reversed(children)]
+        while stack:
+            child, child_parent_id = stack.pop()
+            blob = self._make_blob(child, root_id, root_title, child_parent_id, root_post_number)
+            yield blob
+            stack.extend((c, blob.id) for c in reversed(child.get("children", [])))
+
+    def extract_all_post_blobs(self, post: dict) -> Iterator[PostBlob]:
+        """Yield all blobs (question + answers + followups) from a Piazza post"""
+        history_item = (post.get("history") or _NO_HISTORY)[0]
         root_title = history_item.get("subject", "")
+        post_id = post.get("id", "")
 
         # Extract root question
-        root_blob = {
-            "content": TextProcessor.clean_html_text(history_item.get("content", "")),
-            "title": root_title,
-            "person_id": history_item.get("uid", "anonymous"),
-            "person_name": self.get_name_from_userid(history_item.get("uid", "")),
-            "is_endorsed": "n/a",  # only student answers can be endorsed
-            "date": PiazzaDataExtractor._normalize_piazza_date(history_item.get("created", "")),
-            "post_num": post.get("nr", 0),
-            "id": post.get("id", ""),
-            "parent_id": post.get("id", ""),
-            "root_id": post.get("id", ""),
-            "type": post.get("type", ""),
-        }
-
-        blobs = [root_blob]
+        root_blob = PostBlob(
+            content=TextProcessor.clean_html_text(history_item.get("content", "")),
+            title=root_title,
+            person_id=history_item.get("uid", "anonymous"),
+            person_name=self.get_name_from_userid(history_item.get("uid", "")),
+            is_endorsed="n/a",  # only student answers can be endorsed
+            date=_normalize_piazza_date(history_item.get("created", "")),
+            post_num=post.get("nr", 0),
+            id=post_id,
+            parent_id=post_id,
+            root_id=post_id,
+            type=post.get("type", ""),
+        )
+
+        yield root_blob
 
         # Extract children (answers, followups, etc.)
-        blobs.extend(
-            self.extract_children(
-                post.get("children", []),
-                root_blob["id"],
-                root_title,
-                root_blob["id"],
-                root_blob["post_num"],
-            )
+        yield from self.extract_children(
+            post.get("children", []),
+            root_blob.id,
+            root_title,
+            root_blob.id,
+            root_blob.post_num,
         )
-
-        return blobs
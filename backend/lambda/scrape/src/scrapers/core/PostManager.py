@@ -1,12 +1,18 @@
+import concurrent.futures
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any
 from zoneinfo import ZoneInfo
 
 from config.constants import (
     COURSE_NAMES,
+    DIFF_PREVIEW_LENGTH,
     DISCUSSION_TYPES,
+    DYNAMO_BATCH_GET_SIZE,
     I_ANSWER_UPDATE_TYPES,
     MAJOR_UPDATE_TYPES,
+    MAX_WORKERS,
+    POSTS_TABLE_NAME,
     QUESTION_UPDATE_TYPES,
     S_ANSWER_UPDATE_TYPES,
     SES_RECIPIENT_EMAIL,
@@ -16,6 +22,9 @@ from dto.AnnouncementPostConfig import AnnouncementPostConfig
 from dto.NotificationConfig import NotificationConfig
 from enums.UpdateType import UpdateType
 from scrapers.core.NotificationService import NotificationService
+from scrapers.core.PiazzaDataExtractor import parse_datetime
+
+_UTC = ZoneInfo("UTC")
 
 
 class PostManager:
@@ -34,31 +43,35 @@ class PostManager:
         self.notification_service = notification_service
 
     def get_discussion_content(self, post: dict, change_id: str) -> str:
-        # I can recurse through the entire tree structure which isn't super quick but there aren't gonna be enough discussions for it to really matter efficiency-wise
         logger.debug("Searching discussion tree", extra={"change_id": change_id})
 
-        def dfs(root: dict) -> str | bool:
-            children = root.get("children", [])
-            for child in children:
-                if child.get("type") not in DISCUSSION_TYPES:
+        # walk the discussion tree with an explicit stack; deep threads can't hit the recursion limit
+        discussion_types = frozenset(DISCUSSION_TYPES)
+        stack = [post]
+        while stack:
+            node = stack.pop()
+            for child in node.get("children", ()):
+                if child.get("type") not in discussion_types:
                     continue
                 if child.get("id") == change_id:
                     # for some reason, discussion content is in the subject field
                     return child.get("subject")
-                search_result = dfs(child)
-                if search_result is not False:
-                    return search_result
-
-            return False
-
-        res = dfs(post)
-        if res is not False:
-            return res
-        else:
-            logger.warning("Failed to find discussion", extra={"change_id": change_id})
-            return ""
-
-    def get_post_content(self, change: dict, post: dict) -> tuple[str, str]:
+                stack.append(child)
+
+        logger.warning("Failed to find discussion", extra={"change_id": change_id})
+        return ""
+
+    @staticmethod
+    def index_children_by_type(post: dict) -> dict[str, dict]:
+        """Map each child type to the first child of that type, so answer lookups are O(1)"""
+        first_child_by_type = {}
+        for child in post.get("children", ()):
+            first_child_by_type.setdefault(child.get("type"), child)
+        return first_child_by_type
+
+    def get_post_content(
+        self, change: dict, post: dict, first_child_by_type: dict[str, dict]
+    ) -> tuple[str, str]:
         change_type = change.get("type")
         post_subject = None
         post_content = None
@@ -70,62 +83,73 @@ class PostManager:
             post_content = history_object.get("content")  # this is uncleaned HTML and MD
 
         elif change_type in I_ANSWER_UPDATE_TYPES:
-            for child in post.get("children", []):
-                if child.get("type") == UpdateType.INSTRUCTOR_ANSWER.value:
-                    history_object = child.get("history")[0]
+            child = first_child_by_type.get(UpdateType.INSTRUCTOR_ANSWER.value)
+            if child is not None:
+                history_object = child.get("history")[0]
 
-                    post_content = history_object.get("content")  # this is uncleaned HTML and MD
-                    break
+                post_content = history_object.get("content")  # this is uncleaned HTML and MD
 
         elif change_type in S_ANSWER_UPDATE_TYPES:
-            for child in post.get("children", []):
-                if child.get("type") == UpdateType.STUDENT_ANSWER.value:
-                    history_object = child.get("history")[0]
+            child = first_child_by_type.get(UpdateType.STUDENT_ANSWER.value)
+            if child is not None:
+                history_object = child.get("history")[0]
 
-                    post_content = history_object.get("content")  # this is uncleaned HTML and MD
-                    break
+                post_content = history_object.get("content")  # this is uncleaned HTML and MD
         else:
             post_content = self.get_discussion_content(post, change.get("cid"))
 
         return (post_subject if post_subject else "", post_content)
 
-    # process one change from the list of changes
+    # process one change from the list of changes, returning the diff item to write
     def handle_individual_change(
-        self, change: dict, post: dict, course_id: str, sequence: int
-    ) -> bool:
+        self,
+        change: dict,
+        post: dict,
+        course_id: str,
+        sequence: int,
+        now: datetime,
+        first_child_by_type: dict[str, dict],
+    ) -> tuple[dict, bool]:
         post_id = post.get("id")
         pk = f"{course_id}#{post_id}"
-        sk = f"{self.now.isoformat()}#{sequence}"
+        sk = f"{now.isoformat()}#{sequence}"
 
         change_type = change.get("type")
-        subject, content = self.get_post_content(change, post)
-
-        self.diffs_table.put_item(
-            Item={
-                "course_id#post_id": pk,
-                "timestamp": sk,
-                "course_id": course_id,
-                "post_id": post_id,
-                "type": change_type,
-                "subject": subject,
-                "content": content,
-            }
-        )
-
-        # returns True if major change, else False
-        return change_type in MAJOR_UPDATE_TYPES
+        subject, content = self.get_post_content(change, post, first_child_by_type)
+
+        item = {
+            "course_id#post_id": pk,
+            "timestamp": sk,
+            "course_id": course_id,
+            "post_id": post_id,
+            "type": change_type,
+            "subject": subject,
+            "content": content,
+            # the summarizer only ever reads the first 500 chars, so store them separately
+            "content_preview": content[:DIFF_PREVIEW_LENGTH] if content else "",
+        }
+
+        # the bool is True if major change, else False
+        return item, change_type in MAJOR_UPDATE_TYPES
 
     # set the last update time, last major update time
-    def set_update_times(self, post: dict, course_id: str, had_major_update: bool) -> None:
+    def set_update_times(
+        self, post: dict, course_id: str, had_major_update: bool, now: datetime
+    ) -> None:
         post_id = post.get("id")
         key = {"course_id": course_id, "post_id": post_id}
 
         if had_major_update:
-            update_expr = "SET last_major_update = :lm, last_updated = :lu"
-            expr_values = {":lm": self.now.isoformat(), ":lu": self.now.isoformat()}
+            # needs_summary puts the post in the summarizer's sparse pending index
+            update_expr = "SET last_major_update = :lm, last_updated = :lu, needs_summary = :ns"
+            expr_values = {
+                ":lm": now.isoformat(),
+                ":lu": now.isoformat(),
+                ":ns": 1,
+            }
         else:
             update_expr = "SET last_updated = :lu"
-            expr_values = {":lu": self.now.isoformat()}
+            expr_values = {":lu": now.isoformat()}
 
         try:
             self.posts_table.update_item(
@@ -141,7 +165,9 @@ class PostManager:
                 },
             )
 
-    def put_new_diffs(self, new_post: dict, course_id: str, old_num_changes: int) -> None:
+    def put_new_diffs(
+        self, new_post: dict, course_id: str, old_num_changes: int, now: datetime
+    ) -> None:
         new_change_log = new_post.get("change_log")
 
         # no changes if the lengths are the same
@@ -158,38 +184,42 @@ class PostManager:
         i_answer_handled = False
         s_answer_handled = False
 
-        sequence = 0
-        for change in new_changes:
-            change_type = change.get("type")
-            if change_type in QUESTION_UPDATE_TYPES:
-                if question_handled:
-                    continue
-                question_handled = True
-            elif change_type in I_ANSWER_UPDATE_TYPES:
-                if i_answer_handled:
-                    continue
-                i_answer_handled = True
-            elif change_type in S_ANSWER_UPDATE_TYPES:
-                if s_answer_handled:
-                    continue
-                s_answer_handled = True
-
-            had_major_update = (
-                self.handle_individual_change(change, new_post, course_id, sequence)
-                or had_major_update
-            )
-            sequence += 1
-
-        self.set_update_times(new_post, course_id, had_major_update)
-
-    def _should_notify(self, post: dict) -> bool:
-        is_announcement = bool(post.get("config", {}).get("is_announcement", 0))
-        post_creation_time = post.get("created")
+        # index the answers once instead of scanning the children for every change
+        first_child_by_type = self.index_children_by_type(new_post)
 
+        sequence = 0
+        # batch_writer chunks the puts into BatchWriteItem calls and retries unprocessed items
+        with self.diffs_table.batch_writer() as batch:
+            for change in new_changes:
+                change_type = change.get("type")
+                if change_type in QUESTION_UPDATE_TYPES:
+                    if question_handled:
+                        continue
+                    question_handled = True
+                elif change_type in I_ANSWER_UPDATE_TYPES:
+                    if i_answer_handled:
+                        continue
+                    i_answer_handled = True
+                elif change_type in S_ANSWER_UPDATE_TYPES:
+                    if s_answer_handled:
+                        continue
+                    s_answer_handled = True
+
+                item, is_major = self.handle_individual_change(
+                    change, new_post, course_id, sequence, now, first_child_by_type
+                )
+                batch.put_item(Item=item)
+                had_major_update = is_major or had_major_update
+                sequence += 1
+
+        # UpdateItem can't go through the batch writer
+        self.set_update_times(new_post, course_id, had_major_update, now)
+
+    def _should_notify(self, is_announcement: bool, post_creation_time: str | None) -> bool:
         if not is_announcement or not post_creation_time:
             return False
 
-        post_datetime = datetime.fromisoformat(post_creation_time.replace("Z", "+00:00"))
+        post_datetime = parse_datetime(post_creation_time)
 
         now = datetime.now(timezone.utc)
 
@@ -198,37 +228,40 @@ class PostManager:
 
         return is_announcement and within_48_hours
 
-    def handle_new_post(self, post: dict, course_id: str) -> None:
+    def handle_new_post(self, post: dict, course_id: str, now: datetime) -> None:
         post_id = post.get("id")
         change_log = post.get("change_log")
-        is_announcement = bool(post.get("config").get("is_announcement", 0))
+        history_object = post.get("history")[0]
+        is_announcement = bool(post.get("config", {}).get("is_announcement", 0))
+        course_name = COURSE_NAMES[course_id]
+        now_iso = now.isoformat()
+
         self.posts_table.put_item(
             Item={
                 "course_id": course_id,
                 "post_id": post_id,
-                "course_name": COURSE_NAMES[course_id],
-                "post_title": post.get("history")[0].get("subject"),
-                "last_updated": self.now.isoformat(),
-                "last_major_update": self.now.isoformat(),
+                "course_name": course_name,
+                "post_title": history_object.get("subject"),
+                "last_updated": now_iso,
+                "last_major_update": now_iso,
                 "num_changes": len(change_log),
                 "is_announcement": is_announcement,
                 "current_summary": None,  # this is set when the summarizer runs
-                "summary_last_updated": "1970-01-01T00:00:00Z",  # summarizer should find posts with summary_last_updated < last_major_update OR == None
+                "summary_last_updated": "1970-01-01T00:00:00Z",  # sentinel for "never summarized", never None
                 "needs_new_summary": False,  # should the summarizer reset the summary? Set to True after user asks for summary
+                "needs_summary": 1,  # keeps the post in the summarizer's pending index until summarized
             }
         )
         # put a "new post" event in the diffs table
         # `old_num_changes` is set to 0 for brand new posts
-        self.put_new_diffs(post, course_id, 0)
+        self.put_new_diffs(post, course_id, 0, now)
 
-        if self._should_notify(post):
+        if self._should_notify(is_announcement, post.get("created")):
             notification_config = NotificationConfig(recipient_email=SES_RECIPIENT_EMAIL)
 
-            history_object = post.get("history")[0]
-
             announcement = AnnouncementPostConfig(
                 course_id=course_id,
-                course_name=COURSE_NAMES[course_id],
+                course_name=course_name,
                 post_id=post_id,
                 post_number=post.get("nr"),
                 post_subject=history_object.get("subject"),
@@ -237,9 +270,11 @@ class PostManager:
 
             self.notification_service.send_email_notification(notification_config, announcement)
 
-    def handle_existing_post(self, old_post: dict, new_post: dict, course_id: str) -> None:
+    def handle_existing_post(
+        self, old_post: dict, new_post: dict, course_id: str, now: datetime
+    ) -> None:
         old_num_changes = int(old_post.get("num_changes"))
-        self.put_new_diffs(new_post, course_id, old_num_changes)
+        self.put_new_diffs(new_post, course_id, old_num_changes, now)
 
         post_id = new_post.get("id")
         new_change_log = new_post.get("change_log")
@@ -250,10 +285,90 @@ class PostManager:
             ExpressionAttributeValues={":nc": len(new_change_log)},
         )
 
-    def process_post(self, new_post: dict, course_id: str) -> None:
-        # set global 'now' to have the same time throughout processing
-        # Store in UTC for consistency with Piazza dates (which are in UTC)
-        self.now = datetime.now(ZoneInfo("UTC"))
+    def fetch_existing_posts(self, course_id: str, post_ids: list[str]) -> dict[str, dict]:
+        """Fetch the stored rows for many posts with BatchGetItem, keyed by post_id"""
+        course_id = str(course_id)
+        # BatchGetItem rejects duplicate keys
+        unique_ids = list(dict.fromkeys(str(post_id) for post_id in post_ids))
+
+        existing_posts = {}
+        try:
+            for i in range(0, len(unique_ids), DYNAMO_BATCH_GET_SIZE):
+                request_items = {
+                    POSTS_TABLE_NAME: {
+                        "Keys": [
+                            {"course_id": course_id, "post_id": post_id}
+                            for post_id in unique_ids[i : i + DYNAMO_BATCH_GET_SIZE]
+                        ]
+                    }
+                }
+
+                attempt = 0
+                while request_items:
+                    if attempt:
+                        # back off before retrying keys DynamoDB didn't get to
+                        time.sleep(min(0.05 * 2**attempt, 1))
+                    response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                    for item in response["Responses"].get(POSTS_TABLE_NAME, []):
+                        existing_posts[item["post_id"]] = item
+                    request_items = response.get("UnprocessedKeys")
+                    attempt += 1
+        except Exception:
+            logger.exception(
+                "Failed to fetch posts from DynamoDB",
+                extra={"course_id": course_id, "post_count": len(unique_ids)},
+            )
+            raise
+
+        return existing_posts
+
+    def process_posts(
+        self, new_posts: list[dict], course_id: str, max_workers: int = MAX_WORKERS
+    ) -> list[str]:
+        """Process many posts concurrently, returning the ids of posts that failed.
+
+        Stored rows are fetched in batches up front; the per-post DynamoDB writes are I/O bound
+        so they are spread across a thread pool.
+        """
+        if not new_posts:
+            return []
+
+        post_ids = [new_post.get("id") for new_post in new_posts]
+        try:
+            existing_posts = self.fetch_existing_posts(
+                course_id, [post_id for post_id in post_ids if post_id is not None]
+            )
+        except Exception:
+            # fall back to fetching each post individually
+            existing_posts = None
+
+        failed = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_post = {
+                executor.submit(self.process_post, new_post, course_id, existing_posts): new_post
+                for new_post in new_posts
+            }
+
+            for future in concurrent.futures.as_completed(future_to_post):
+                post_id = future_to_post[future].get("id")
+                try:
+                    future.result()
+                except Exception:
+                    failed.append(str(post_id))
+                    logger.exception(
+                        "Failed processing post",
+                        extra={"course_id": course_id, "post_id": post_id},
+                    )
+
+        return failed
+
+    def process_post(
+        self, new_post: dict, course_id: str, existing_posts: dict[str, dict] | None = None
+    ) -> None:
+        """Process one post. `existing_posts` is a prefetch from fetch_existing_posts, if any"""
+        # use the same 'now' throughout processing; it is passed down rather than stored on self
+        # so concurrent process_post calls don't race. Store in UTC to match Piazza dates
+        now = datetime.now(_UTC)
 
         post_id = new_post.get("id")
 
@@ -272,27 +387,11 @@ class PostManager:
         course_id = str(course_id)
         post_id = str(post_id)
 
-        try:
-            logger.info(
-                "Processing post - checking types",
-                extra={
-                    "course_id_type": str(type(course_id)),
-                    "post_id_type": str(type(post_id)),
-                    "course_id": course_id,
-                    "post_id": post_id,
-                },
-            )
-
-            response = self.posts_table.get_item(Key={"course_id": course_id, "post_id": post_id})
-            existing_post = response.get("Item")
-        except Exception:
-            logger.exception(
-                "Failed to fetch post from DynamoDB",
-                extra={"course_id": course_id, "post_id": post_id},
-            )
-            raise
+        if existing_posts is None:
+            existing_posts = self.fetch_existing_posts(course_id, [post_id])
+        existing_post = existing_posts.get(post_id)
 
         if existing_post:
-            self.handle_existing_post(existing_post, new_post, course_id)
+            self.handle_existing_post(existing_post, new_post, course_id, now)
         else:
-            self.handle_new_post(new_post, course_id)
+            self.handle_new_post(new_post, course_id, now)
@@ -1,68 +1,130 @@
-import concurrent.futures
-from datetime import datetime
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from aws_lambda_powertools.metrics import MetricUnit
-from boto3.dynamodb.conditions import Attr
-from utils.clients import dynamo, openai
-from utils.constants import DIFFS_TABLE_NAME, POSTS_TABLE_NAME
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from openai import AsyncOpenAI
+from utils.clients import async_openai, dynamo
+from utils.constants import (
+    DIFFS_TABLE_NAME,
+    MAX_CONCURRENT_SUMMARIES,
+    OPENAI_MAX_REQUESTS_PER_MINUTE,
+    POSTS_TABLE_NAME,
+    SUMMARY_BATCH_SIZE,
+    SUMMARY_BATCH_WAIT_SECONDS,
+    SUMMARY_CACHE_SIZE,
+    SUMMARY_PENDING_INDEX_NAME,
+)
 from utils.logger import logger
 from utils.metrics import metrics
+from utils.utils import parse_datetime
 
 dynamodb = dynamo()
 posts_table = dynamodb.Table(POSTS_TABLE_NAME)
 diffs_table = dynamodb.Table(DIFFS_TABLE_NAME)
-open_ai_client = openai()
+# low-level client for the per-post writes, which we marshal ourselves
+dynamo_client = dynamodb.meta.client
+# build the OpenAI client during init; it (and its open connections) lives as long as the
+# container, so every invocation has to run on this one event loop
+open_ai_client = async_openai()
+_event_loop = asyncio.new_event_loop()
 
-# how many posts we process at the exact same time.
-MAX_WORKERS = 10
+
+def _warm_connections() -> None:
+    """Open the DynamoDB and OpenAI connections during init, which isn't billed per request"""
+    try:
+        dynamo_client.describe_endpoints()
+    except Exception:
+        logger.warning("Failed to warm DynamoDB connection", exc_info=True)
+
+    try:
+        # on the handler's loop, since that's the one the OpenAI connection pool belongs to
+        _event_loop.run_until_complete(asyncio.wait_for(open_ai_client.models.list(), timeout=2))
+    except Exception:
+        logger.warning("Failed to warm OpenAI connection", exc_info=True)
+
+
+_warm_connections()
+
+# attributes lambda_handler needs to decide whether (and how) to summarize a post
+PENDING_POST_PROJECTION = (
+    "course_id, post_id, post_title, current_summary, summary_last_updated, "
+    "last_major_update, needs_new_summary, last_diffs_hash"
+)
+
+# old LA-offset last_major_update/last_updated values are normalized by `backfill.py utc_timestamps`
+SUMMARY_UPDATE_EXPRESSION = (
+    "SET current_summary = :s, summary_last_updated = :t, needs_new_summary = :f, "
+    "last_diffs_hash = :h"
+)
+# used when the diffs are the ones we already summarized, so the summary itself stays
+SUMMARY_TOUCH_EXPRESSION = "SET summary_last_updated = :t, needs_new_summary = :f"
+# the post hasn't had a major update since we read it (:lm is the last_major_update we read)
+UNCHANGED_MAJOR_UPDATE_CONDITION = "last_major_update = :lm"
+_FALSE = {"BOOL": False}
+
+# build the zone once rather than on every timestamp we normalize
+_UTC = ZoneInfo("UTC")
+
+# diffs newer than this are "every diff" for posts that were never summarized
+EPOCH_ISO = "1970-01-01T00:00:00+00:00"
+# summary_last_updated placeholders sort below this, meaning the post was never summarized
+NEVER_SUMMARIZED_BEFORE = "2000-01-01T00:00:00Z"
+
+# structured output for a batched request: one summary string per post, in order. Parsing
+# numbered lines instead would cut multi-line summaries short and misread lines starting "3."
+_BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "name": "batched_summaries",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {"summaries": {"type": "array", "items": {"type": "string"}}},
+        "required": ["summaries"],
+        "additionalProperties": False,
+    },
+}
+
+# summaries by prompt hash, kept across warm invocations so a post whose write failed
+# doesn't pay for the exact same OpenAI request again on the next run
+_summary_cache: OrderedDict[str, str] = OrderedDict()
+
+# event loop time at which the next OpenAI request may start
+_OPENAI_REQUEST_INTERVAL = 60 / OPENAI_MAX_REQUESTS_PER_MINUTE
+_next_openai_request_time = 0.0
 
 
 @logger.inject_lambda_context(log_event=True)
 @metrics.log_metrics(capture_cold_start_metric=False)
 def lambda_handler(event: dict, context: dict) -> dict:
-    items_to_process = []
-
-    response = posts_table.scan(
-        FilterExpression=Attr("last_major_update").gt(Attr("summary_last_updated"))
-    )
-
-    items_to_process.extend(response["Items"])
+    metrics.add_metric(name="SummarizerRuns", unit=MetricUnit.Count, value=1)
 
-    while "LastEvaluatedKey" in response:
-        response = posts_table.scan(
-            FilterExpression=Attr("last_major_update").gt(Attr("summary_last_updated")),
-            ExclusiveStartKey=response["LastEvaluatedKey"],
-        )
-        items_to_process.extend(response["Items"])
+    posts, results = _event_loop.run_until_complete(summarize_pending_posts())
 
-    total_posts = len(items_to_process)
+    total_posts = len(posts)
     logger.info("Found posts requiring summarization", extra={"post_count": total_posts})
 
-    metrics.add_metric(name="SummarizerRuns", unit=MetricUnit.Count, value=1)
-
-    if not items_to_process:
+    if not posts:
         return {"statusCode": 200, "body": "No posts to update."}
 
-    # dispatch tasks to a thread pool
     processed = 0
     failed = 0
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_post = {executor.submit(summarize_post, post): post for post in items_to_process}
-
-        # process results as they complete
-        for future in concurrent.futures.as_completed(future_to_post):
-            post = future_to_post[future]
-            try:
-                future.result()
-                processed += 1
-            except Exception:
-                failed += 1
-                metrics.add_metric(name="SummarizerFailures", unit=MetricUnit.Count, value=1)
-                logger.exception(
-                    "Summarization thread failed",
-                    extra={"course_id": post.get("course_id"), "post_id": post.get("post_id")},
-                )
+    for post, result in zip(posts, results, strict=True):
+        if isinstance(result, Exception):
+            failed += 1
+            metrics.add_metric(name="SummarizerFailures", unit=MetricUnit.Count, value=1)
+            logger.error(
+                "Summarization task failed",
+                extra={"course_id": post.get("course_id"), "post_id": post.get("post_id")},
+                exc_info=result,
+            )
+        else:
+            processed += 1
 
     metrics.add_metric(name="SummarizerPostsProcessed", unit=MetricUnit.Count, value=processed)
     logger.info(
@@ -75,41 +137,162 @@ def lambda_handler(event: dict, context: dict) -> dict:
     }
 
 
-def summarize_post(post: dict) -> None:
-    pk = f"{post['course_id']}#{post['post_id']}"
+async def summarize_pending_posts() -> tuple[list[dict], list]:
+    """Summarize every flagged post, returning the posts and each one's result or exception"""
+    # the work is almost entirely waiting on OpenAI, so one event loop can keep far more
+    # requests in flight than a thread pool while the semaphore respects rate limits
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SUMMARIES)
+    posts = []
+    tasks = []
 
+    batcher = SummaryBatcher(open_ai_client)
     # Store timestamps in UTC for consistency with Piazza dates
-    current_time = datetime.now(ZoneInfo("UTC"))
+    current_time = datetime.now(_UTC)
+
+    async def bounded(post: dict) -> None:
+        async with semaphore:
+            await summarize_post(post, batcher, current_time)
+
+    # the scraper flags posts with needs_summary whenever they get a major update, so only
+    # flagged posts live in this sparse index and we never have to read the whole table
+    # only read the keys and timestamps here; summarize_post loads the (large) summary text
+    # itself, and only for posts that actually have new diffs
+    query_kwargs = {
+        "IndexName": SUMMARY_PENDING_INDEX_NAME,
+        "KeyConditionExpression": Key("needs_summary").eq(1),
+        "ProjectionExpression": PENDING_POST_PROJECTION,
+    }
+    while True:
+        response = await asyncio.to_thread(posts_table.query, **query_kwargs)
+        # start summarizing this page while we fetch the next one
+        for post in response["Items"]:
+            posts.append(post)
+            tasks.append(asyncio.create_task(bounded(post)))
+
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    return posts, results
+
+
+class SummaryBatcher:
+    """Collects concurrent summary prompts and sends them to OpenAI a batch at a time.
+
+    Every request repeats the same system instructions, so grouping posts into one request
+    saves those tokens and most of the per-request latency. A batch is sent once it is full,
+    or SUMMARY_BATCH_WAIT_SECONDS after its first prompt arrived.
+    """
+
+    def __init__(self, client: AsyncOpenAI):
+        self.client = client
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # hold references so in-flight batches aren't garbage collected
+        self._in_flight: set[asyncio.Task] = set()
+
+    async def summarize(self, prompt_input: str) -> str:
+        cache_key = _digest(prompt_input)
+        cached = _summary_cache.get(cache_key)
+        if cached is not None:
+            _summary_cache.move_to_end(cache_key)
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt_input, future))
+
+        if len(self._pending) >= SUMMARY_BATCH_SIZE:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(SUMMARY_BATCH_WAIT_SECONDS, self._flush)
+
+        summary = await future
+        _summary_cache[cache_key] = summary
+        if len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+        return summary
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            if len(prompts) == 1:
+                summaries = [await call_openai(self.client, prompts[0])]
+            else:
+                summaries = await call_openai_batch(self.client, prompts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), summary in zip(batch, summaries, strict=True):
+            future.set_result(summary)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _to_utc(dt: datetime) -> datetime:
+    """Return dt in UTC, skipping the conversion when it already is (the common case)"""
+    if dt.tzinfo is None:
+        # Assume UTC if no timezone info (for backward compatibility)
+        return dt.replace(tzinfo=_UTC)
+    if dt.tzinfo is _UTC:
+        return dt
+    offset = dt.utcoffset()
+    if offset is not None and not offset:
+        return dt
+    return dt.astimezone(_UTC)
+
+
+async def summarize_post(post: dict, batcher: SummaryBatcher, current_time: datetime) -> None:
+    pk = f"{post['course_id']}#{post['post_id']}"
 
     last_summarized_raw = post.get("summary_last_updated")
 
     if last_summarized_raw:
         # Normalize to UTC for consistent comparison (handles old LA timezone data)
         try:
-            dt = datetime.fromisoformat(last_summarized_raw)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=ZoneInfo("UTC"))
-            else:
-                dt = dt.astimezone(ZoneInfo("UTC"))
-            query_time_limit = dt.isoformat()
+            query_time_limit = _to_utc(parse_datetime(last_summarized_raw)).isoformat()
         except ValueError:
             # Fallback to raw value if parsing fails
             query_time_limit = last_summarized_raw
     else:
-        query_time_limit = "1970-01-01T00:00:00+00:00"
+        query_time_limit = EPOCH_ISO
 
     # get all diffs that have happened since the last time it was summarized
-    diffs_response = diffs_table.query(
-        KeyConditionExpression="#pk = :pk AND #ts > :last",
-        ExpressionAttributeNames={"#pk": "course_id#post_id", "#ts": "timestamp"},
-        ExpressionAttributeValues={":pk": pk, ":last": query_time_limit},
-    )
+    # boto3 is blocking, so run the (quick) DynamoDB calls on the default thread pool
+    diffs = await asyncio.to_thread(query_new_diffs, pk, query_time_limit)
 
-    if not diffs_response["Items"]:
+    if not diffs:
         logger.debug("No new diffs to summarize", extra={"post_key": pk})
+        await asyncio.to_thread(clear_needs_summary, post)
+        return
+
+    events_text = format_diffs(diffs)
+
+    # a diff written while the last run was in progress is read again by the next run, so the
+    # same set of diffs can come back; its summary is already stored
+    diffs_hash = _digest(events_text)
+    if diffs_hash == post.get("last_diffs_hash") and not post.get("needs_new_summary", False):
+        logger.debug("Diffs already summarized", extra={"post_key": pk})
+        await asyncio.to_thread(write_summary, post, current_time.isoformat())
         return
 
-    events_text = format_diffs(diffs_response["Items"])
     post_title = post.get("post_title", "Untitled")
     current_summary = post.get("current_summary", "No summary available.")
 
@@ -117,130 +300,247 @@ def summarize_post(post: dict) -> None:
 
     if is_fresh_start:
         logger.info("Generating fresh summary", extra={"post_key": pk})
-        prompt_content = (
-            f"Summary type: New Updates Report\n"
-            f"Post Title: {post_title}\n"
-            f"Context (Previously established facts): {current_summary}\n"
-            f"--- END CONTEXT ---\n\n"
-            f"Recent Updates (The only thing to summarize):\n{events_text}\n\n"
-            "Task: Summarize ONLY the 'Recent Updates'. "
-            "Use the 'Context' to understand what the updates are referring to, but DO NOT repeat the context in your output. "
-            "If the updates are just replies, state who (student vs instructor) replied and the resolution."
-        )
+        prompt_template = FRESH_SUMMARY_PROMPT
     else:
-        prompt_content = (
-            f"Summary type: Running Log Update\n"
-            f"Post Title: {post_title}\n"
-            f"Current Running Summary: {current_summary}\n\n"
-            f"New Updates to append/merge:\n{events_text}\n\n"
-            "Task: Update the 'Current Running Summary' to include the 'New Updates'. "
-            "Keep the history intact but condense slightly if it gets too long."
-        )
+        prompt_template = RUNNING_SUMMARY_PROMPT
+    prompt_content = prompt_template.format(
+        post_title=post_title, current_summary=current_summary, events_text=events_text
+    )
 
-    summary = call_openai(prompt_content)
+    summary = await batcher.summarize(prompt_content)
 
-    # Normalize existing timestamps to UTC when updating (for backward compatibility)
-    # This ensures future comparisons work correctly even with old LA timezone data
-    update_expr = "SET current_summary = :s, summary_last_updated = :t, needs_new_summary = :f"
-    expr_values = {":s": summary, ":t": current_time.isoformat(), ":f": False}
+    await asyncio.to_thread(
+        write_summary, post, current_time.isoformat(), summary=summary, diffs_hash=diffs_hash
+    )
+    logger.info("Updated summary", extra={"post_key": pk})
 
-    # Also normalize last_major_update and last_updated if they exist and are in old format
-    # This prevents comparison issues in DynamoDB FilterExpression
-    last_major = post.get("last_major_update")
-    last_updated_val = post.get("last_updated")
 
-    if last_major:
-        try:
-            dt = datetime.fromisoformat(last_major)
-            if dt.tzinfo and dt.tzinfo.utcoffset(dt).total_seconds() != 0:
-                # Has timezone offset (not UTC), normalize to UTC
-                dt_utc = dt.astimezone(ZoneInfo("UTC"))
-                update_expr += ", last_major_update = :lm"
-                expr_values[":lm"] = dt_utc.isoformat()
-        except ValueError:
-            pass  # Skip if can't parse
+def query_new_diffs(pk: str, since: str) -> list[dict]:
+    """Every diff for the post newer than since, following pagination past 1MB of results"""
+    query_kwargs = {
+        "KeyConditionExpression": "#pk = :pk AND #ts > :last",
+        "ProjectionExpression": "#ts, #t, subject, content_preview",
+        "ExpressionAttributeNames": {"#pk": "course_id#post_id", "#ts": "timestamp", "#t": "type"},
+        "ExpressionAttributeValues": {":pk": pk, ":last": since},
+    }
+    response = diffs_table.query(**query_kwargs)
+    diffs = response["Items"]
 
-    if last_updated_val:
-        try:
-            dt = datetime.fromisoformat(last_updated_val)
-            if dt.tzinfo and dt.tzinfo.utcoffset(dt).total_seconds() != 0:
-                # Has timezone offset (not UTC), normalize to UTC
-                dt_utc = dt.astimezone(ZoneInfo("UTC"))
-                update_expr += ", last_updated = :lu"
-                expr_values[":lu"] = dt_utc.isoformat()
-        except ValueError:
-            pass  # Skip if can't parse
+    while "LastEvaluatedKey" in response:
+        response = diffs_table.query(**query_kwargs, ExclusiveStartKey=response["LastEvaluatedKey"])
+        diffs.extend(response["Items"])
 
-    posts_table.update_item(
-        Key={"course_id": post["course_id"], "post_id": post["post_id"]},
-        UpdateExpression=update_expr,
-        ExpressionAttributeValues=expr_values,
-    )
-    logger.info("Updated summary", extra={"post_key": pk})
+    return diffs
+
+
+def _string_value(value: str | None) -> dict:
+    """Marshal a string attribute for the low-level client (a missing one compares as NULL)"""
+    return {"S": value} if value is not None else {"NULL": True}
+
+
+def _post_key(post: dict) -> dict:
+    return {"course_id": {"S": post["course_id"]}, "post_id": {"S": post["post_id"]}}
+
+
+def write_summary(
+    post: dict, summarized_at: str, summary: str | None = None, diffs_hash: str | None = None
+) -> None:
+    """Store a new summary, clearing the pending flag unless a newer major update arrived.
+
+    Without a summary only the summarized-at time moves forward and the stored summary is kept.
+    """
+    # the update's shape is fixed, so marshal it by hand and skip the resource layer's
+    # per-attribute type inspection
+    key = _post_key(post)
+    expr_values = {":t": {"S": summarized_at}, ":f": _FALSE}
+    if summary is None:
+        update_expr = SUMMARY_TOUCH_EXPRESSION
+    else:
+        update_expr = SUMMARY_UPDATE_EXPRESSION
+        expr_values[":s"] = {"S": summary}
+        expr_values[":h"] = {"S": diffs_hash}
+    try:
+        # only clear the pending flag if the scraper hasn't recorded a newer major update since
+        # we read the post, otherwise that update would never get summarized
+        dynamo_client.update_item(
+            TableName=POSTS_TABLE_NAME,
+            Key=key,
+            UpdateExpression=update_expr + " REMOVE needs_summary",
+            ConditionExpression=UNCHANGED_MAJOR_UPDATE_CONDITION,
+            ExpressionAttributeValues={
+                **expr_values,
+                ":lm": _string_value(post.get("last_major_update")),
+            },
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        dynamo_client.update_item(
+            TableName=POSTS_TABLE_NAME,
+            Key=key,
+            UpdateExpression=update_expr,
+            ExpressionAttributeValues=expr_values,
+        )
+
+
+def clear_needs_summary(post: dict) -> None:
+    """Drop a post from the pending-summary index unless it got a newer major update"""
+    try:
+        dynamo_client.update_item(
+            TableName=POSTS_TABLE_NAME,
+            Key=_post_key(post),
+            UpdateExpression="REMOVE needs_summary",
+            ConditionExpression=UNCHANGED_MAJOR_UPDATE_CONDITION,
+            ExpressionAttributeValues={":lm": _string_value(post.get("last_major_update"))},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
 
 
 def needs_fresh_summary(post: dict, current_time: datetime) -> bool:
-    needs_new = post.get("needs_new_summary", False)
     last_summarized_str = post.get("summary_last_updated")
     summarization_range = 2  # days
 
     # if never summarized, we can't have a fresh start because there's no start to begin with
-    if not last_summarized_str or last_summarized_str < "2000-01-01T00:00:00Z":
+    if not last_summarized_str or last_summarized_str < NEVER_SUMMARIZED_BEFORE:
         return False
 
+    if post.get("needs_new_summary", False):
+        return True
+
+    # we write summary_last_updated as a UTC isoformat string, and those sort chronologically,
+    # so anything after the cutoff is recent without parsing it (older rows may use LA offsets)
+    if last_summarized_str.endswith("+00:00"):
+        cutoff = (current_time - timedelta(days=summarization_range + 1)).isoformat()
+        if last_summarized_str > cutoff:
+            return False
+
     try:
-        last_summarized_dt = datetime.fromisoformat(last_summarized_str)
-        if last_summarized_dt.tzinfo is None:
-            # Assume UTC if no timezone info (for backward compatibility)
-            last_summarized_dt = last_summarized_dt.replace(tzinfo=ZoneInfo("UTC"))
-        else:
-            # Ensure both timestamps are in UTC for comparison
-            last_summarized_dt = last_summarized_dt.astimezone(ZoneInfo("UTC"))
+        # Ensure both timestamps are in UTC for comparison
+        last_summarized_dt = _to_utc(parse_datetime(last_summarized_str))
 
         days_since_summary = (current_time - last_summarized_dt).days
-        outside_of_range = days_since_summary > summarization_range
+        return days_since_summary > summarization_range
     except ValueError:
         return True
 
-    return needs_new or outside_of_range
-
 
 def format_diffs(diffs: list[dict]) -> str:
-    formatted = []
-    for diff in diffs:
-        timestamp = diff["timestamp"]
-        diff_type = diff.get("type", "update")
-        subject = diff.get("subject", "")
-        content = diff.get("content", "")
-
-        formatted.append(f"[{timestamp}] {diff_type.upper()}")
-        if subject:
-            formatted.append(f"Subject: {subject}")
-        if content:
-            formatted.append(f"Content: {content[:500]}...")
-        formatted.append("")
-
-    return "\n".join(formatted)
-
-
-def call_openai(prompt_input: str) -> str:
-    system_instructions = (
-        "You are a backend summarization engine for a technical course forum. "
-        "Your output is for a 'Catch Me Up' dashboard. The user should know what's been happening on the forum.\n"
-        "RULES:\n"
-        "1. ATTRIBUTED BREVITY: Always identify the source of key info (e.g., 'Instructor confirmed...', 'Student reported issue with...').\n"
-        "2. IF RESOLVED: State the solution clearly (e.g., 'Instructor clarified that only one screenshot is required').\n"
-        "3. IF UNRESOLVED: Summarize the core question (e.g., 'Student asked for clarification on the deadline; no response yet.').\n"
-        "4. FRESH SUMMARIES (CONTEXT USE): When provided with a 'Previous Summary' as context, do not repeat it. "
-        "Summarize ONLY the 'New Updates', but use the context to anchor the topic (e.g., 'Instructor provided the missing screenshot,' rather than just 'Instructor posted an image').\n"
-        "5. FORMATTING: Max 2 sentences. No bullet points."
-    )
-
-    response = open_ai_client.responses.create(
+    # each diff is a block of lines ending in a newline, with a blank line between blocks
+    return "\n".join(_format_diff(diff) for diff in diffs)
+
+
+def _format_diff(diff: dict) -> str:
+    text = f"[{diff['timestamp']}] {diff.get('type', 'update').upper()}\n"
+    subject = diff.get("subject")
+    if subject:
+        text += f"Subject: {subject}\n"
+    # the scraper stores the first 500 chars of each diff as content_preview; diffs written
+    # before that are filled in by `backfill.py content_preview`
+    content = diff.get("content_preview")
+    if content:
+        text += f"Content: {content}...\n"
+    return text
+
+
+# filled in with post_title, current_summary and events_text by summarize_post
+FRESH_SUMMARY_PROMPT = (
+    "Summary type: New Updates Report\n"
+    "Post Title: {post_title}\n"
+    "Context (Previously established facts): {current_summary}\n"
+    "--- END CONTEXT ---\n\n"
+    "Recent Updates (The only thing to summarize):\n{events_text}\n\n"
+    "Task: Summarize ONLY the 'Recent Updates'. "
+    "Use the 'Context' to understand what the updates are referring to, but DO NOT repeat the context in your output. "
+    "If the updates are just replies, state who (student vs instructor) replied and the resolution."
+)
+
+RUNNING_SUMMARY_PROMPT = (
+    "Summary type: Running Log Update\n"
+    "Post Title: {post_title}\n"
+    "Current Running Summary: {current_summary}\n\n"
+    "New Updates to append/merge:\n{events_text}\n\n"
+    "Task: Update the 'Current Running Summary' to include the 'New Updates'. "
+    "Keep the history intact but condense slightly if it gets too long."
+)
+
+SYSTEM_INSTRUCTIONS = (
+    "You are a backend summarization engine for a technical course forum. "
+    "Your output is for a 'Catch Me Up' dashboard. The user should know what's been happening on the forum.\n"
+    "RULES:\n"
+    "1. ATTRIBUTED BREVITY: Always identify the source of key info (e.g., 'Instructor confirmed...', 'Student reported issue with...').\n"
+    "2. IF RESOLVED: State the solution clearly (e.g., 'Instructor clarified that only one screenshot is required').\n"
+    "3. IF UNRESOLVED: Summarize the core question (e.g., 'Student asked for clarification on the deadline; no response yet.').\n"
+    "4. FRESH SUMMARIES (CONTEXT USE): When provided with a 'Previous Summary' as context, do not repeat it. "
+    "Summarize ONLY the 'New Updates', but use the context to anchor the topic (e.g., 'Instructor provided the missing screenshot,' rather than just 'Instructor posted an image').\n"
+    "5. FORMATTING: Max 2 sentences. No bullet points."
+)
+
+BATCH_INSTRUCTIONS = (
+    "\n\nYou will be given several numbered posts. Apply the rules to each post on its own, "
+    "never mixing information between posts. Respond with a 'summaries' array holding exactly "
+    "one summary per post, in the same order as the posts."
+)
+
+
+async def _wait_for_openai_slot() -> None:
+    """Space out OpenAI requests so we stay under OPENAI_MAX_REQUESTS_PER_MINUTE"""
+    global _next_openai_request_time
+    # everything runs on one event loop, so claiming a slot needs no lock
+    now = asyncio.get_running_loop().time()
+    wait = _next_openai_request_time - now
+    _next_openai_request_time = max(now, _next_openai_request_time) + _OPENAI_REQUEST_INTERVAL
+
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+async def call_openai(client: AsyncOpenAI, prompt_input: str) -> str:
+    await _wait_for_openai_slot()
+    response = await client.responses.create(
         model="gpt-5-mini",
         reasoning={"effort": "minimal"},
-        instructions=system_instructions,
+        instructions=SYSTEM_INSTRUCTIONS,
         input=prompt_input,
     )
 
     return response.output[1].content[0].text
+
+
+async def call_openai_batch(client: AsyncOpenAI, prompt_inputs: list[str]) -> list[str]:
+    """Summarize several posts in one request, one summary per prompt in the same order"""
+    batch_input = "\n\n".join(
+        f"=== POST {number} ===\n{prompt_input}"
+        for number, prompt_input in enumerate(prompt_inputs, start=1)
+    )
+
+    await _wait_for_openai_slot()
+    response = await client.responses.create(
+        model="gpt-5-mini",
+        reasoning={"effort": "minimal"},
+        instructions=SYSTEM_INSTRUCTIONS + BATCH_INSTRUCTIONS,
+        input=batch_input,
+        text={"format": _BATCH_RESPONSE_FORMAT},
+    )
+
+    try:
+        summaries = json.loads(response.output[1].content[0].text)["summaries"]
+    except (ValueError, KeyError, TypeError):
+        summaries = None
+    if (
+        isinstance(summaries, list)
+        and len(summaries) == len(prompt_inputs)
+        and all(isinstance(summary, str) and summary.strip() for summary in summaries)
+    ):
+        return [summary.strip() for summary in summaries]
+
+    # the model returned the wrong number of summaries (or none), so don't risk attaching
+    # the wrong summary to a post
+    logger.warning(
+        "Batched summary response was malformed, summarizing individually",
+        extra={"batch_size": len(prompt_inputs)},
+    )
+    return list(
+        await asyncio.gather(*(call_openai(client, prompt_input) for prompt_input in prompt_inputs))
+    )
@@ -1,23 +1,61 @@
 from functools import cache
+from importlib.util import find_spec
 from typing import Any
 
 import boto3
-from openai import OpenAI
-from utils.constants import AWS_REGION_NAME, SECRETS
-from utils.utils import get_secret_api_key
+import httpx
+from botocore.config import Config
+from openai import AsyncOpenAI
+from utils.constants import AWS_REGION_NAME, MAX_CONCURRENT_SUMMARIES, SECRETS
+from utils.utils import get_secret_api_keys
+
+# httpx only speaks HTTP/2 when the optional h2 package is installed
+_HTTP2_AVAILABLE = find_spec("h2") is not None
+
+# keep sockets alive between calls, and size the pool for the default executor that
+# asyncio.to_thread runs the DynamoDB calls on (at most 32 threads)
+_AWS_CONFIG = Config(
+    max_pool_connections=32,
+    retries={"max_attempts": 3, "mode": "adaptive"},
+    tcp_keepalive=True,
+    connect_timeout=1,
+    read_timeout=5,
+)
 
 
 @cache
 def dynamo() -> Any:
-    return boto3.resource("dynamodb")
+    return boto3.resource("dynamodb", config=_AWS_CONFIG)
 
 
 @cache
 def ssm_manager() -> Any:
-    return boto3.client("ssm", region_name=AWS_REGION_NAME)
+    return boto3.client("ssm", region_name=AWS_REGION_NAME, config=_AWS_CONFIG)
+
+
+@cache
+def secrets() -> dict[str, str]:
+    """Every secret in SECRETS by its key, fetched with one Parameter Store call per container"""
+    values = get_secret_api_keys(ssm_manager(), list(SECRETS.values()))
+    return {key: values[name] for key, name in SECRETS.items()}
 
 
 @cache
-def openai() -> OpenAI:
-    openai_api_key = get_secret_api_key(ssm_manager(), SECRETS["OPENAI"])
-    return OpenAI(api_key=openai_api_key)
+def async_openai() -> AsyncOpenAI:
+    """Shared AsyncOpenAI client, reused across warm invocations.
+
+    Its connection pool is bound to the event loop that first uses it, so callers must run
+    every invocation on the same loop (see handler._event_loop).
+    """
+    transport = httpx.AsyncHTTPTransport(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=MAX_CONCURRENT_SUMMARIES,
+            max_keepalive_connections=MAX_CONCURRENT_SUMMARIES,
+            keepalive_expiry=60.0,
+        ),
+        # retries failed connection attempts; the OpenAI client retries failed requests
+        retries=2,
+    )
+    http_client = httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(30.0, connect=2.0))
+    return AsyncOpenAI(api_key=secrets()["OPENAI"], http_client=http_client, max_retries=2)
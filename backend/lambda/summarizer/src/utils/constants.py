@@ -1,5 +1,19 @@
+import os
+
 AWS_REGION_NAME = "us-west-2"
 POSTS_TABLE_NAME = "piazza-posts"
 DIFFS_TABLE_NAME = "piazza-post-diffs"
+# sparse GSI on posts: partition key needs_summary (N), sort key last_major_update (S)
+SUMMARY_PENDING_INDEX_NAME = "SummaryPendingIndex"
 
 SECRETS = {"OPENAI": "open_ai_key"}
+
+# how many posts we summarize at the exact same time, tunable without a redeploy
+MAX_CONCURRENT_SUMMARIES = int(os.environ.get("SUMMARIZER_MAX_CONCURRENCY", "50"))
+# keep OpenAI requests under the account's rate limit instead of eating 429 retries
+OPENAI_MAX_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_MAX_RPM", "500"))
+# how many posts share one OpenAI request, and how long a partial batch waits for more
+SUMMARY_BATCH_SIZE = 6
+SUMMARY_BATCH_WAIT_SECONDS = 0.05
+# how many recent summaries each warm container remembers by prompt
+SUMMARY_CACHE_SIZE = 1024
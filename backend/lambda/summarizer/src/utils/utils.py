@@ -1,24 +1,45 @@
 import json
+from datetime import datetime
 
 from botocore.exceptions import ClientError
 from utils.logger import logger
 
+try:
+    # C parser, much faster than fromisoformat and handles the trailing "Z" natively
+    from ciso8601 import parse_datetime
+except ImportError:
 
-def get_secret_api_key(client, secret_name: str) -> str:
-    """Retrieve API key from AWS Parameter Store."""
+    def parse_datetime(date_str: str) -> datetime:
+        if date_str.endswith("Z"):
+            date_str = date_str[:-1] + "+00:00"
+        return datetime.fromisoformat(date_str)
+
+
+def get_secret_api_keys(client, secret_names: list[str]) -> dict[str, str]:
+    """Retrieve several API keys from AWS Parameter Store in one call."""
     try:
-        response = client.get_parameter(Name=secret_name, WithDecryption=True)
-        return response["Parameter"]["Value"]
+        response = client.get_parameters(Names=secret_names, WithDecryption=True)
     except ClientError as e:
         logger.exception(
             "Failed to retrieve credentials from Parameter Store",
-            extra={"secret_name": secret_name},
+            extra={"secret_names": secret_names},
         )
         raise RuntimeError(f"Failed to retrieve credentials from Parameter Store: {e}") from e
     except Exception:
-        logger.exception("Unexpected error retrieving secret", extra={"secret_name": secret_name})
+        logger.exception(
+            "Unexpected error retrieving secrets", extra={"secret_names": secret_names}
+        )
         raise
 
+    if response["InvalidParameters"]:
+        logger.error(
+            "Secrets missing from Parameter Store",
+            extra={"secret_names": response["InvalidParameters"]},
+        )
+        raise RuntimeError(f"Secrets missing from Parameter Store: {response['InvalidParameters']}")
+
+    return {parameter["Name"]: parameter["Value"] for parameter in response["Parameters"]}
+
 
 def send_websocket_message(apigw_management, connection_id: str, message_data: dict) -> None:
     """Send a message through the WebSocket connection."""